@@ -12,11 +12,15 @@ class Settings(BaseSettings):
     # MongoDB Configuration
     MONGODB_URI: str = "mongodb://localhost:27017"
     DATABASE_NAME: str = "krishilok_db"
+    MONGODB_MAX_POOL_SIZE: int = 50
+    MONGODB_MIN_POOL_SIZE: int = 10
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = 5000
     
     # JWT Configuration
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_DAYS: int = 7
+    BCRYPT_ROUNDS: int = 12  # Password hashing cost (each +1 doubles hashing time)
     
     # File Upload Configuration
     UPLOAD_FOLDER: str = "./uploads"
@@ -29,8 +33,15 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     
+    # Disease Detection Configuration
+    TORCH_COMPILE_MODELS: bool = False  # torch.compile the crop models (slower startup, faster inference)
+    
     # OpenRouter API Configuration (for AI-powered treatment advice)
     OPENROUTER_API_KEY: Optional[str] = None
+    LLM_CACHE_DIR: str = "./cache/llm"  # Persistent response cache (requires diskcache)
+    
+    # Audio Transcription Configuration
+    WHISPER_MODEL_SIZE: str = "base"
     
     class Config:
         env_file = ".env"
@@ -1,14 +1,16 @@
 """
-Database module for MongoDB connection using Motor (async driver)
+Database module for MongoDB connection using PyMongo's native async driver
 """
-from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+import asyncio
+from pymongo import AsyncMongoClient
+from pymongo.asynchronous.database import AsyncDatabase
 from app.config import settings
 from typing import Optional
 
 
 class Database:
-    client: Optional[AsyncIOMotorClient] = None
-    db: Optional[AsyncIOMotorDatabase] = None
+    client: Optional[AsyncMongoClient] = None
+    db: Optional[AsyncDatabase] = None
 
 
 db = Database()
@@ -17,7 +19,12 @@ db = Database()
 async def connect_to_mongo():
     """Connect to MongoDB on application startup"""
     print(f"Connecting to MongoDB at {settings.MONGODB_URI}...")
-    db.client = AsyncIOMotorClient(settings.MONGODB_URI)
+    db.client = AsyncMongoClient(
+        settings.MONGODB_URI,
+        maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+        minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
+        serverSelectionTimeoutMS=settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS
+    )
     db.db = db.client[settings.DATABASE_NAME]
     
     # Test connection
@@ -29,15 +36,72 @@ async def connect_to_mongo():
         raise
 
 
+async def create_indexes():
+    """Create indexes backing the hot query paths (idempotent, safe on every startup)"""
+    database = db.db
+    try:
+        await asyncio.gather(
+            # Suggestions for a disease, best first
+            database.suggestions.create_index([("disease_name", 1), ("usefulness_score", -1)]),
+            database.suggestions.create_index("id", unique=True),
+            # One feedback per user per suggestion + per-suggestion averages
+            database.trust_feedback.create_index([("user_id", 1), ("suggestion_id", 1)], unique=True),
+            database.trust_feedback.create_index("suggestion_id"),
+            # Trust score feedback breakdown per farmer
+            database.trust_feedback.create_index([("farmer_id", 1), ("category", 1)]),
+            # Trust score polling
+            database.users.create_index("updated_at"),
+            # Authenticated user lookups
+            database.users.create_index("id", unique=True),
+            # Trust score: a user's comments (verified / helpful counts) and accepted answers
+            database.post_comments.create_index("user_id"),
+            database.post_comments.create_index([("user_id", 1), ("is_verified", 1)]),
+            database.post_comments.create_index("id"),
+            database.community_posts.create_index("accepted_response_id", sparse=True),
+            # Scan comments lookups
+            database.comments.create_index([("scan_id", 1), ("id", 1)]),
+        )
+        print("✓ MongoDB indexes ensured")
+    except Exception as e:
+        print(f"⚠️  Failed to create MongoDB indexes: {e}")
+
+
+async def backfill_feedback_categories():
+    """
+    Set the category field on trust_feedback documents written before it existed
+    
+    No-op once every document has a category, so it is safe on every startup.
+    """
+    database = db.db
+    buckets = [
+        ("positive", {"$gte": 4}),
+        ("neutral", 3),
+        ("negative", {"$lte": 2}),
+    ]
+    try:
+        results = await asyncio.gather(*(
+            database.trust_feedback.update_many(
+                {"category": {"$exists": False}, "score": score_filter},
+                {"$set": {"category": category}}
+            )
+            for category, score_filter in buckets
+        ))
+        updated = sum(result.modified_count for result in results)
+        if updated:
+            print(f"✓ Backfilled category on {updated} trust feedback documents")
+    except Exception as e:
+        print(f"⚠️  Failed to backfill trust feedback categories: {e}")
+
+
 async def close_mongo_connection():
     """Close MongoDB connection on application shutdown"""
     if db.client:
         print("Closing MongoDB connection...")
-        db.client.close()
+        await db.client.close()
         print("✓ MongoDB connection closed")
 
 
-def get_database() -> AsyncIOMotorDatabase:
+def get_database() -> AsyncDatabase:
     """Get database instance for dependency injection"""
     return db.db
 
@@ -4,19 +4,24 @@ Agricultural Community Support Platform
 """
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 import os
 import logging
 
 from app.config import settings
-from app.database import connect_to_mongo, close_mongo_connection
+from app.database import (
+    connect_to_mongo, close_mongo_connection, create_indexes,
+    backfill_feedback_categories, get_database
+)
+from app.services.notification_queue import start_notification_writer, stop_notification_writer
+from app.services.storage_service import ensure_upload_dirs
+from app.utils.security import start_password_pool, shutdown_password_pool
 from app.routes import auth, scans, community, suggestions, notifications, language
-from app.services import ml_service
+from app.services import ml_service, translation_service, audio_service
 from app.services.rag_service import RAGService
 from app.services.llm_service import LLMService
-from app.services.translation_service import TranslationService
-from app.services.audio_service import AudioService
 
 # Configure logging
 logging.basicConfig(
@@ -35,8 +40,15 @@ async def lifespan(app: FastAPI):
     print("🚀 Starting KrishiLok Backend...")
     logger.info("=" * 60)
     
+    # Fork the password hashing workers before any service starts threads
+    await start_password_pool()
+    
     # Connect to MongoDB
     await connect_to_mongo()
+    await create_indexes()
+    await backfill_feedback_categories()
+    start_notification_writer(get_database())
+    ensure_upload_dirs()
     
     # Initialize ML Service
     try:
@@ -66,23 +78,17 @@ async def lifespan(app: FastAPI):
         logger.warning("⚠️  AI-powered treatment advice will not be available")
     
     # Initialize Translation Service
-    try:
-        logger.info("🌐 Initializing Translation Service (IndicTrans2)...")
-        from app.services import translation_service
-        translation_service.translation_service = TranslationService()
+    logger.info("🌐 Initializing Translation Service (IndicTrans2)...")
+    if await translation_service.get_translation_service():
         logger.info("✅ Translation Service initialized successfully")
-    except Exception as e:
-        logger.error(f"⚠️  Failed to initialize Translation service: {str(e)}")
+    else:
         logger.warning("⚠️  Multi-language support will not be available")
     
     # Initialize Audio Service
-    try:
-        logger.info("🎤 Initializing Audio Service (Whisper)...")
-        from app.services import audio_service
-        audio_service.audio_service = AudioService(model_size="base")
+    logger.info("🎤 Initializing Audio Service (Whisper)...")
+    if await audio_service.get_audio_service():
         logger.info("✅ Audio Service initialized successfully")
-    except Exception as e:
-        logger.error(f"⚠️  Failed to initialize Audio service: {str(e)}")
+    else:
         logger.warning("⚠️  Audio transcription will not be available")
     
     logger.info("=" * 60)
@@ -92,7 +98,13 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     print("🛑 Shutting down KrishiLok Backend...")
+    if ml_service.ml_service:
+        await ml_service.ml_service.aclose()
+    if scans.llm_service:
+        await scans.llm_service.aclose()
+    await stop_notification_writer(get_database())
     await close_mongo_connection()
+    shutdown_password_pool()
     print("✓ Application shutdown complete")
 
 
@@ -102,6 +114,7 @@ app = FastAPI(
     description="Agricultural Community Support Platform with AI-powered disease detection",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/docs",
     redoc_url="/redoc"
 )
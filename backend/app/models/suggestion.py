@@ -56,6 +56,7 @@ class TrustFeedbackInDB(BaseModel):
     user_id: str
     farmer_id: str
     score: int = Field(..., ge=1, le=5)
+    category: Optional[str] = None  # positive / neutral / negative, derived from score on write
     feedback_text: Optional[str] = None
     scan_id: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
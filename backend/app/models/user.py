@@ -1,7 +1,7 @@
 """
 User model for authentication and user management
 """
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, PrivateAttr
 from typing import Optional, Literal
 from datetime import datetime
 from uuid import uuid4
@@ -17,12 +17,25 @@ class UserBase(BaseModel):
     role: Literal["farmer", "expert", "extension_worker", "admin"] = "farmer"
 
 
-class UserCreate(UserBase):
+class PasswordBytesMixin(BaseModel):
+    """Encodes the password field once, for the bytes-based hashing functions"""
+    _password_bytes: bytes = PrivateAttr(default=b"")
+    
+    def model_post_init(self, __context) -> None:
+        # UTF-8, truncated to 72 bytes (bcrypt limitation); same as encode_password
+        self._password_bytes = self.password.encode("utf-8")[:72]
+    
+    @property
+    def password_bytes(self) -> bytes:
+        return self._password_bytes
+
+
+class UserCreate(PasswordBytesMixin, UserBase):
     """Model for user registration"""
     password: str = Field(..., min_length=6)
 
 
-class UserLogin(BaseModel):
+class UserLogin(PasswordBytesMixin):
     """Model for user login"""
     identifier: str = Field(..., description="Email or phone number")
     password: str
@@ -2,7 +2,7 @@
 Authentication routes for user registration and login
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.asynchronous.database import AsyncDatabase
 from app.database import get_database
 from app.models.user import UserCreate, UserLogin, UserResponse, Token
 from app.services.auth_service import register_user, authenticate_user
@@ -15,7 +15,7 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 @router.post("/register", response_model=dict, status_code=status.HTTP_201_CREATED)
 async def register(
     user_data: UserCreate,
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """
     Register a new user
@@ -37,7 +37,7 @@ async def register(
 @router.post("/login", response_model=dict)
 async def login(
     login_data: UserLogin,
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """
     Login with email/phone and password
@@ -2,7 +2,7 @@
 Community routes for posts and comments
 """
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.asynchronous.database import AsyncDatabase
 from typing import List, Optional
 from datetime import datetime
 from app.database import get_database
@@ -25,7 +25,7 @@ async def create_post(
     scan_id: Optional[str] = Form(None),
     image: Optional[UploadFile] = File(None),
     current_user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """
     Create a new community post
@@ -83,7 +83,7 @@ async def get_posts(
     crop_name: Optional[str] = None,
     page: int = 1,
     limit: int = 10,
-    db: AsyncIOMotorDatabase = Depends(get_database),
+    db: AsyncDatabase = Depends(get_database),
     current_user: Optional[UserInDB] = Depends(optional_user)
 ):
     """
@@ -153,7 +153,7 @@ async def get_posts(
 @router.get("/posts/{post_id}", response_model=dict)
 async def get_post_details(
     post_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """Get detailed information about a specific post including comments"""
     try:
@@ -214,7 +214,7 @@ async def add_comment(
     post_id: str,
     comment_data: CommentCreate,
     current_user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """Add a response/comment to a post"""
     try:
@@ -269,7 +269,7 @@ async def resolve_post(
     post_id: str,
     accepted_response_id: str,
     current_user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """Mark a post as resolved with an accepted response"""
     try:
@@ -5,7 +5,9 @@ from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File,
 from typing import List, Optional
 from app.utils.dependencies import get_current_user
 from app.models.user import UserInDB
-from app.services import translation_service, audio_service
+from app.services.translation_service import TranslationService, get_translation_service
+from app.services.audio_service import AudioService, get_audio_service
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,7 +19,8 @@ async def translate_text(
     texts: List[str],
     src_lang: str = Form(..., description="Source language: en, ta, kn"),
     tgt_lang: str = Form(..., description="Target language: en, ta, kn"),
-    current_user: UserInDB = Depends(get_current_user)
+    current_user: UserInDB = Depends(get_current_user),
+    translator: Optional[TranslationService] = Depends(get_translation_service)
 ):
     """
     Translate text between English, Tamil, and Kannada
@@ -27,14 +30,15 @@ async def translate_text(
     - **tgt_lang**: Target language code
     """
     try:
-        if not translation_service.translation_service:
+        if not translator:
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail="Translation service not available"
             )
         
-        translations = translation_service.translation_service.translate(
-            texts, src_lang, tgt_lang
+        # Model inference is blocking, keep it off the event loop
+        translations = await asyncio.to_thread(
+            translator.translate, texts, src_lang, tgt_lang
         )
         
         return {
@@ -59,7 +63,8 @@ async def translate_text(
 async def transcribe_audio(
     audio: UploadFile = File(..., description="Audio file (mp3, wav, m4a, etc.)"),
     language: Optional[str] = Form(None, description="Expected language: en, ta, kn (auto-detect if not specified)"),
-    current_user: UserInDB = Depends(get_current_user)
+    current_user: UserInDB = Depends(get_current_user),
+    transcriber: Optional[AudioService] = Depends(get_audio_service)
 ):
     """
     Transcribe audio to text using Whisper
@@ -68,7 +73,7 @@ async def transcribe_audio(
     - **language**: Expected language (optional, auto-detects if not provided)
     """
     try:
-        if not audio_service.audio_service:
+        if not transcriber:
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail="Audio service not available"
@@ -77,8 +82,9 @@ async def transcribe_audio(
         # Read audio bytes
         audio_bytes = await audio.read()
         
-        # Transcribe
-        result = audio_service.audio_service.transcribe_bytes(
+        # Transcribe (Whisper is blocking, keep it off the event loop)
+        result = await asyncio.to_thread(
+            transcriber.transcribe_bytes,
             audio_bytes,
             language=language,
             filename=audio.filename or "audio.mp3"
@@ -2,7 +2,7 @@
 Notifications routes
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.asynchronous.database import AsyncDatabase
 from datetime import datetime
 from app.database import get_database
 from app.models.user import UserInDB
@@ -16,7 +16,7 @@ async def get_notifications(
     unread_only: bool = False,
     limit: int = 20,
     current_user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """
     Get user's notifications
@@ -49,7 +49,7 @@ async def get_notifications(
 async def mark_notification_read(
     notification_id: str,
     current_user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """Mark a notification as read"""
     try:
@@ -91,7 +91,7 @@ async def mark_notification_read(
 async def delete_notification(
     notification_id: str,
     current_user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """Delete a notification"""
     try:
@@ -2,7 +2,7 @@
 Scan routes for disease detection - Updated with RAG+LLM
 """
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.asynchronous.database import AsyncDatabase
 from typing import List, Optional
 from datetime import datetime
 import logging
@@ -14,6 +14,7 @@ from app.services.storage_service import save_upload_file
 from app.services.ml_service import get_ml_service
 from app.services.rag_service import RAGService
 from app.services.llm_service import LLMService
+from app.services.translation_service import TranslationService, get_translation_service
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/scans", tags=["Disease Detection"])
@@ -152,7 +153,7 @@ async def create_scan(
     description: Optional[str] = Form(None, description="Optional description"),
     language: str = Form("en"),
     current_user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """
     Upload crop image for disease detection using ML models
@@ -225,7 +226,7 @@ async def create_scan(
                 
                 if raw_disease_info:
                     # Step 2: Format context for LLM
-                    context = rag_service.format_context_for_llm(raw_disease_info)
+                    context = rag_service.format_context_for_llm(raw_disease_info, cache_key=disease_name)
                     
                     # Step 3: Generate AI advice using OpenRouter
                     logger.info(f"Generating AI treatment advice...")
@@ -235,7 +236,8 @@ async def create_scan(
                         context=context,
                         confidence=confidence,
                         disease_info=raw_disease_info,
-                        language=language
+                        language=language,
+                        localized_disease_info=rag_service.get_localized_entry(disease_name, language)
                     )
                     logger.info(f"✓ AI advice generated successfully")
                 else:
@@ -343,7 +345,7 @@ async def create_scan(
         ]
         
         try:
-            cursor = db.scans.aggregate(pipeline)
+            cursor = await db.scans.aggregate(pipeline)
             community_advice = await cursor.to_list(length=3)
             logger.info(f"Found {len(community_advice)} community solutions for {disease_name}")
         except Exception as e:
@@ -393,7 +395,7 @@ async def get_user_scans(
     limit: int = 10,
     language: str = Query("en", description="Language code for translation (en, ta, kn)"),
     current_user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """
     Get current user's scan history with optional translation
@@ -450,7 +452,7 @@ async def get_community_scans(
     disease_name: Optional[str] = None,
     language: str = Query("en", description="Language code for translation (en, ta, kn)"),
     current_user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """
     Get community feed of all scans for collaboration with optional translation
@@ -531,7 +533,7 @@ async def get_scan_details(
     scan_id: str,
     language: str = Query("en", description="Language code for translation (en, ta, kn)"),
     current_user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """
     Get detailed information about a specific scan with community advice and translation
@@ -612,7 +614,7 @@ async def get_scan_details(
                 }
             ]
             
-            cursor = db.scans.aggregate(pipeline)
+            cursor = await db.scans.aggregate(pipeline)
             community_advice = await cursor.to_list(length=5)
             
             logger.info(f"Found {len(community_advice)} high-trust community advice for {disease_name}")
@@ -671,7 +673,7 @@ async def get_scan_details(
 async def delete_scan(
     scan_id: str,
     current_user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """
     Delete a scan
@@ -718,7 +720,7 @@ async def add_comment_to_scan(
     scan_id: str,
     advice: str = Form(..., description="Advice or comment"),
     current_user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """
     Add advice/comment to a scan in the community
@@ -775,7 +777,7 @@ async def get_scan_comments(
     skip: int = 0,
     limit: int = 10,
     current_user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """
     Get all comments/advice for a specific scan
@@ -818,7 +820,7 @@ async def mark_comment_helpful(
     scan_id: str,
     comment_id: str,
     current_user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """
     Mark a comment as helpful
@@ -840,7 +842,10 @@ async def mark_comment_helpful(
             )
         
         # Get updated comment
-        comment = await db.comments.find_one({"id": comment_id})
+        comment = await db.comments.find_one(
+            {"id": comment_id, "scan_id": scan_id},
+            projection={"_id": 0}
+        )
         
         return {
             "success": True,
@@ -862,7 +867,8 @@ async def mark_comment_helpful(
 async def test_translation(
     text: str = Query("Rice Sheath Blight", description="Text to translate"),
     target_lang: str = Query("ta", description="Target language (ta or kn)"),
-    current_user: UserInDB = Depends(get_current_user)
+    current_user: UserInDB = Depends(get_current_user),
+    translator: Optional[TranslationService] = Depends(get_translation_service)
 ):
     """
     TEST ENDPOINT: Verify IndicTrans translation works
@@ -873,8 +879,7 @@ async def test_translation(
     try:
         logger.info(f"🧪 TEST TRANSLATION: '{text}' (en → {target_lang})")
         
-        from app.services import translation_service
-        if not translation_service.translation_service:
+        if not translator:
             logger.error("❌ Translation service not initialized!")
             return {
                 "success": False,
@@ -882,7 +887,6 @@ async def test_translation(
                 "message": "IndicTrans not loaded"
             }
         
-        translator = translation_service.translation_service
         logger.info(f"✓ Translation service found: {translator}")
         logger.info(f"✓ Device: {translator.device}")
         logger.info(f"✓ Processor: {translator.processor}")
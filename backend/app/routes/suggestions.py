@@ -2,7 +2,7 @@
 Suggestions routes for community suggestions and trust feedback
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.asynchronous.database import AsyncDatabase
 from typing import List
 from datetime import datetime, timedelta
 from app.database import get_database
@@ -13,22 +13,29 @@ from app.models.suggestion import (
 )
 from app.utils.dependencies import get_current_user
 from app.services.trust_score import TrustScoreCalculator
+from app.services.notification_queue import enqueue_notification
 
 router = APIRouter(prefix="/suggestions", tags=["Suggestions"])
 
+# Follow-up notifications are scheduled 10-15 days after feedback
+FOLLOW_UP_DELAY = timedelta(days=12)
+
 
 @router.get("/{scan_id}", response_model=dict)
 async def get_suggestions(
     scan_id: str,
     current_user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """
     Get suggestions for a specific disease/scan
     """
     try:
         # Get scan to find disease name
-        scan = await db.scans.find_one({"id": scan_id})
+        scan = await db.scans.find_one(
+            {"id": scan_id},
+            projection={"_id": 0, "disease_name": 1}
+        )
         
         if not scan:
             raise HTTPException(
@@ -40,30 +47,39 @@ async def get_suggestions(
         if not disease_name:
             return {"success": True, "data": {"suggestions": []}}
         
-        # Get suggestions for this disease
-        cursor = db.suggestions.find(
-            {"disease_name": disease_name}
-        ).sort("usefulness_score", -1).limit(10)
-        
-        suggestions = await cursor.to_list(length=10)
-        
-        # Enrich with author data
-        enriched_suggestions = []
-        for suggestion in suggestions:
-            user = await db.users.find_one({"id": suggestion["user_id"]})
-            
-            enriched = {
-                "id": suggestion["id"],
-                "text": suggestion["text"],
-                "author": {
-                    "id": user["id"] if user else None,
-                    "name": user.get("name") if user else "Unknown",
-                    "avatar": user.get("avatar_url") if user else None
-                },
-                "usefulness": suggestion.get("usefulness_score", 50.0),
-                "details": suggestion.get("details")
+        # Get top suggestions for this disease, joined with author data.
+        # The $project stage emits the API shape directly.
+        pipeline = [
+            {"$match": {"disease_name": disease_name}},
+            {"$sort": {"usefulness_score": -1}},
+            {"$limit": 10},
+            {
+                "$lookup": {
+                    "from": "users",
+                    "localField": "user_id",
+                    "foreignField": "id",
+                    "as": "author"
+                }
+            },
+            {"$set": {"author": {"$arrayElemAt": ["$author", 0]}}},
+            {
+                "$project": {
+                    "_id": 0,
+                    "id": 1,
+                    "text": 1,
+                    "author": {
+                        "id": {"$ifNull": ["$author.id", None]},
+                        "name": {"$ifNull": ["$author.name", "Unknown"]},
+                        "avatar": {"$ifNull": ["$author.avatar_url", None]}
+                    },
+                    "usefulness": {"$ifNull": ["$usefulness_score", 50.0]},
+                    "details": {"$ifNull": ["$details", None]}
+                }
             }
-            enriched_suggestions.append(enriched)
+        ]
+        
+        cursor = await db.suggestions.aggregate(pipeline)
+        enriched_suggestions = await cursor.to_list(length=10)
         
         return {
             "success": True,
@@ -83,7 +99,7 @@ async def get_suggestions(
 async def create_suggestion(
     suggestion_data: SuggestionCreate,
     current_user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """
     Create a new suggestion for a disease
@@ -114,14 +130,17 @@ async def create_suggestion(
 async def submit_trust_feedback(
     feedback_data: TrustFeedback,
     current_user: UserInDB = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """
     Submit trust score feedback for a suggestion
     """
     try:
         # Get suggestion to find farmer_id
-        suggestion = await db.suggestions.find_one({"id": feedback_data.suggestion_id})
+        suggestion = await db.suggestions.find_one(
+            {"id": feedback_data.suggestion_id},
+            projection={"_id": 0, "user_id": 1}
+        )
         
         if not suggestion:
             raise HTTPException(
@@ -133,7 +152,7 @@ async def submit_trust_feedback(
         existing_feedback = await db.trust_feedback.find_one({
             "user_id": current_user.id,
             "suggestion_id": feedback_data.suggestion_id
-        })
+        }, projection={"_id": 1})
         
         if existing_feedback:
             raise HTTPException(
@@ -147,6 +166,7 @@ async def submit_trust_feedback(
             user_id=current_user.id,
             farmer_id=suggestion["user_id"],
             score=feedback_data.score,
+            category=TrustScoreCalculator.feedback_category(feedback_data.score),
             feedback_text=feedback_data.feedback,
             scan_id=feedback_data.scan_id
         )
@@ -158,7 +178,8 @@ async def submit_trust_feedback(
             {"$match": {"suggestion_id": feedback_data.suggestion_id}},
             {"$group": {"_id": None, "avg_score": {"$avg": "$score"}}}
         ]
-        avg_result = await db.trust_feedback.aggregate(avg_score_pipeline).to_list(1)
+        avg_cursor = await db.trust_feedback.aggregate(avg_score_pipeline)
+        avg_result = await avg_cursor.to_list(1)
         
         if avg_result:
             avg_score = avg_result[0]["avg_score"]
@@ -178,15 +199,13 @@ async def submit_trust_feedback(
         
         # Update farmer's trust score
         farmer_id = suggestion["user_id"]
-        if feedback_data.score >= 4:
-            new_score = await TrustScoreCalculator.increment_score(farmer_id, "positive_feedback", db)
-        elif feedback_data.score <= 2:
-            new_score = await TrustScoreCalculator.increment_score(farmer_id, "negative_feedback", db)
-        else:
-            new_score = await TrustScoreCalculator.increment_score(farmer_id, "neutral_feedback", db)
+        new_score = await TrustScoreCalculator.increment_score(
+            farmer_id, f"{feedback.category}_feedback", db
+        )
         
         # Schedule follow-up notification (10-15 days)
-        follow_up_date = datetime.utcnow() + timedelta(days=12)
+        now = datetime.utcnow()
+        follow_up_date = now + FOLLOW_UP_DELAY
         notification = {
             "id": str(feedback.id),
             "user_id": current_user.id,
@@ -200,10 +219,10 @@ async def submit_trust_feedback(
             "is_read": False,
             "scheduled_for": follow_up_date,
             "sent_at": None,
-            "created_at": datetime.utcnow()
+            "created_at": now
         }
         
-        await db.notifications.insert_one(notification)
+        await enqueue_notification(notification, db)
         
         return {
             "success": True,
@@ -226,7 +245,7 @@ async def submit_trust_feedback(
 @router.get("/trust-scores/updated", response_model=dict)
 async def get_updated_trust_scores(
     updated_after: str = None,
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ):
     """
     Get updated trust scores for farmers
@@ -237,7 +256,7 @@ async def get_updated_trust_scores(
             from datetime import datetime
             query["updated_at"] = {"$gte": datetime.fromisoformat(updated_after)}
         
-        cursor = db.users.find(query, {"id": 1, "trust_score": 1})
+        cursor = db.users.find(query, projection={"_id": 0, "id": 1, "trust_score": 1})
         users = await cursor.to_list(length=None)
         
         farmers = [{"id": user["id"], "trustScore": user.get("trust_score", 50.0)} for user in users]
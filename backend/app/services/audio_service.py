@@ -2,9 +2,13 @@
 Audio Transcription Service using OpenAI Whisper
 Converts audio (Tamil, Kannada, English) to text
 """
+import asyncio
+import io
 import os
 import tempfile
-from typing import Optional
+from typing import Optional, Union
+
+import numpy as np
 
 try:
     import whisper
@@ -14,8 +18,23 @@ except ImportError:
     WHISPER_AVAILABLE = False
     whisper = None
 
+try:
+    import soundfile as sf
+    SOUNDFILE_AVAILABLE = True
+except ImportError:
+    SOUNDFILE_AVAILABLE = False
+    sf = None
+
+try:
+    import ffmpeg
+except ImportError:
+    ffmpeg = None
+
 from app.config import settings
 
+# Whisper models expect 16 kHz mono float32 audio
+WHISPER_SAMPLE_RATE = 16000
+
 
 class AudioService:
     """Service for transcribing audio to text using Whisper"""
@@ -35,6 +54,7 @@ class AudioService:
         
         print(f"📥 Loading Whisper model: {model_size}...")
         self.model = whisper.load_model(model_size)
+        self._use_cuda = self.model.device.type == "cuda"
         print(f"✓ Audio Service initialized with Whisper-{model_size}")
         
         # Supported languages
@@ -44,16 +64,36 @@ class AudioService:
             "kn": "kannada"
         }
     
+    def warmup(self):
+        """
+        Run a dummy transcription of one second of silence so CUDA kernels
+        and cuDNN autotuning are primed before the first real request
+        """
+        if not WHISPER_AVAILABLE or self.model is None:
+            return
+        
+        if self._use_cuda:
+            import torch
+            torch.backends.cudnn.benchmark = True
+        
+        self.model.transcribe(
+            np.zeros(WHISPER_SAMPLE_RATE, dtype=np.float32),
+            language="english",
+            fp16=self._use_cuda
+        )
+        print("✓ Whisper warmed up")
+    
     def transcribe_audio(
         self, 
-        audio_file_path: str, 
+        audio_file_path: Union[str, np.ndarray], 
         language: Optional[str] = None
     ) -> dict:
         """
         Transcribe audio file to text
         
         Args:
-            audio_file_path: Path to audio file (mp3, wav, m4a, etc.)
+            audio_file_path: Path to audio file (mp3, wav, m4a, etc.) or
+                             16 kHz mono float32 waveform
             language: Expected language code (en, ta, kn) or None for auto-detect
         
         Returns:
@@ -77,14 +117,18 @@ class AudioService:
             if language and language in self.supported_langs:
                 whisper_lang = self.supported_langs[language]
             
-            print(f"🎤 Transcribing audio: {os.path.basename(audio_file_path)}")
+            if isinstance(audio_file_path, str):
+                print(f"🎤 Transcribing audio: {os.path.basename(audio_file_path)}")
+            else:
+                duration = len(audio_file_path) / WHISPER_SAMPLE_RATE
+                print(f"🎤 Transcribing audio: {duration:.1f}s in-memory waveform")
             
             # Transcribe
             result = self.model.transcribe(
                 audio_file_path,
                 language=whisper_lang,
                 task="transcribe",  # Use "translate" to translate to English
-                fp16=False  # Use fp32 for CPU compatibility
+                fp16=self._use_cuda  # fp16 only on GPU, fp32 for CPU compatibility
             )
             
             detected_lang = result.get("language", "unknown")
@@ -109,6 +153,39 @@ class AudioService:
                 "error": str(e)
             }
     
+    def _decode_audio_bytes(self, audio_bytes: bytes) -> np.ndarray:
+        """
+        Decode audio bytes to a 16 kHz mono float32 waveform in memory
+        
+        Formats libsndfile understands (wav, flac, ogg) at 16 kHz are decoded
+        in-process. Anything else (mp3, m4a, other sample rates) is piped
+        through ffmpeg's stdin, which is what Whisper does for file paths,
+        so no temporary file is written either way.
+        """
+        if SOUNDFILE_AVAILABLE:
+            try:
+                data, sample_rate = sf.read(
+                    io.BytesIO(audio_bytes),
+                    dtype="float32",
+                    always_2d=False
+                )
+                if sample_rate == WHISPER_SAMPLE_RATE:
+                    if data.ndim > 1:
+                        data = data.mean(axis=1)
+                    return np.ascontiguousarray(data, dtype=np.float32)
+            except Exception:
+                pass  # Unsupported container, let ffmpeg handle it
+        
+        if ffmpeg is None:
+            raise RuntimeError("ffmpeg-python is required to decode this audio format")
+        
+        out, _ = (
+            ffmpeg.input("pipe:0", threads=0)
+            .output("-", format="s16le", acodec="pcm_s16le", ac=1, ar=WHISPER_SAMPLE_RATE)
+            .run(input=audio_bytes, capture_stdout=True, capture_stderr=True)
+        )
+        return np.frombuffer(out, np.int16).flatten().astype(np.float32) / 32768.0
+    
     def transcribe_bytes(
         self, 
         audio_bytes: bytes, 
@@ -121,27 +198,94 @@ class AudioService:
         Args:
             audio_bytes: Audio file bytes
             language: Expected language code
-            filename: Original filename (for extension detection)
+            filename: Original filename (for logging and the temp file suffix)
         
         Returns:
             Transcription result dictionary
         """
-        # Save to temporary file
+        if not WHISPER_AVAILABLE or self.model is None:
+            return {
+                "text": "",
+                "language": "unknown",
+                "segments": [],
+                "success": False,
+                "error": "Whisper not available"
+            }
+        
+        try:
+            audio = self._decode_audio_bytes(audio_bytes)
+        except Exception as e:
+            if ffmpeg is None:
+                # No ffmpeg-python for in-memory decoding: Whisper's own loader
+                # can still read the bytes from a file via the ffmpeg binary
+                return self._transcribe_via_temp_file(audio_bytes, language, filename)
+            print(f"❌ Audio decode error ({filename}): {e}")
+            return {
+                "text": "",
+                "language": "unknown",
+                "segments": [],
+                "success": False,
+                "error": f"Could not decode audio: {e}"
+            }
+        
+        return self.transcribe_audio(audio, language)
+    
+    def _transcribe_via_temp_file(
+        self,
+        audio_bytes: bytes,
+        language: Optional[str],
+        filename: str
+    ) -> dict:
+        """Write the upload to a temporary file and transcribe it from there"""
         with tempfile.NamedTemporaryFile(
-            delete=False, 
-            suffix=os.path.splitext(filename)[1]
+            delete=False,
+            suffix=os.path.splitext(os.path.basename(filename))[1]
         ) as tmp_file:
             tmp_file.write(audio_bytes)
             tmp_path = tmp_file.name
         
         try:
-            result = self.transcribe_audio(tmp_path, language)
-            return result
+            return self.transcribe_audio(tmp_path, language)
         finally:
-            # Clean up temp file
             if os.path.exists(tmp_path):
                 os.remove(tmp_path)
 
 
-# Global instance
+# Global instance (created once by get_audio_service)
 audio_service: Optional[AudioService] = None
+_audio_service_lock: Optional[asyncio.Lock] = None
+_audio_service_failed = False  # Set after a failed load so later calls don't retry it
+
+
+async def get_audio_service() -> Optional[AudioService]:
+    """
+    Get the shared audio service, loading Whisper on first use
+    
+    Concurrent first callers wait on a lock so the model is only loaded
+    (and its memory allocated) once. Loading runs in a worker thread so
+    the event loop keeps serving other requests meanwhile.
+    
+    A failed load is not retried: later calls return None straight away
+    (restart the server after fixing the cause).
+    
+    Returns:
+        AudioService instance, or None if it could not be initialized
+    """
+    global audio_service, _audio_service_lock, _audio_service_failed
+    if audio_service is not None or _audio_service_failed:
+        return audio_service
+    
+    if _audio_service_lock is None:
+        _audio_service_lock = asyncio.Lock()
+    
+    async with _audio_service_lock:
+        if audio_service is None and not _audio_service_failed:
+            try:
+                service = await asyncio.to_thread(AudioService, settings.WHISPER_MODEL_SIZE)
+                await asyncio.to_thread(service.warmup)
+                audio_service = service
+            except Exception as e:
+                _audio_service_failed = True
+                print(f"❌ Failed to initialize audio service: {e}")
+    
+    return audio_service
@@ -1,15 +1,42 @@
 """
 Authentication service for user registration and login
 """
+import asyncio
 from datetime import datetime
-from typing import Optional
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from typing import Optional, Set
+from pymongo.asynchronous.database import AsyncDatabase
 from app.models.user import UserCreate, UserLogin, UserInDB, Token, UserResponse
-from app.utils.security import verify_password, get_password_hash, create_access_token
+from app.utils.security import (
+    verify_password_bytes_async, get_password_hash_bytes_async, get_password_hash_if_needed,
+    create_access_token
+)
+from app.utils.dependencies import invalidate_user_cache
 from fastapi import HTTPException, status
 
+# Only fetch the fields UserInDB is built from (skips _id and any extra profile data)
+USER_IN_DB_PROJECTION = {"_id": 0, **{field: 1 for field in UserInDB.model_fields}}
 
-async def register_user(user_data: UserCreate, db: AsyncIOMotorDatabase) -> UserResponse:
+# Background password rehash tasks (referenced so they aren't garbage collected mid-run)
+_rehash_tasks: Set[asyncio.Task] = set()
+
+
+async def _rehash_password(user_id: str, old_hash: str, password_bytes: bytes, db: AsyncDatabase):
+    """Replace an outdated password hash after a successful login"""
+    try:
+        new_hash = await get_password_hash_if_needed(old_hash, password_bytes)
+        if new_hash is None:
+            return
+        # Only replace the hash we verified, in case the password changed meanwhile
+        await db.users.update_one(
+            {"id": user_id, "password_hash": old_hash},
+            {"$set": {"password_hash": new_hash}}
+        )
+        invalidate_user_cache(user_id)
+    except Exception as e:
+        print(f"⚠️  Failed to rehash password for user {user_id}: {e}")
+
+
+async def register_user(user_data: UserCreate, db: AsyncDatabase) -> UserResponse:
     """
     Register a new user
     
@@ -40,7 +67,7 @@ async def register_user(user_data: UserCreate, db: AsyncIOMotorDatabase) -> User
     # Create new user
     user_in_db = UserInDB(
         **user_data.model_dump(exclude={"password"}),
-        password_hash=get_password_hash(user_data.password)
+        password_hash=await get_password_hash_bytes_async(user_data.password_bytes)
     )
     
     # Insert into database
@@ -51,7 +78,7 @@ async def register_user(user_data: UserCreate, db: AsyncIOMotorDatabase) -> User
 
 async def authenticate_user(
     login_data: UserLogin, 
-    db: AsyncIOMotorDatabase
+    db: AsyncDatabase
 ) -> tuple[UserInDB, Token]:
     """
     Authenticate user and return user data with token
@@ -72,7 +99,7 @@ async def authenticate_user(
             {"email": login_data.identifier},
             {"phone": login_data.identifier}
         ]
-    })
+    }, projection=USER_IN_DB_PROJECTION)
     
     if not user_dict:
         raise HTTPException(
@@ -83,7 +110,7 @@ async def authenticate_user(
     user = UserInDB(**user_dict)
     
     # Verify password
-    if not verify_password(login_data.password, user.password_hash):
+    if not await verify_password_bytes_async(login_data.password_bytes, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
@@ -96,11 +123,17 @@ async def authenticate_user(
             detail="User account is inactive"
         )
     
+    # Upgrade hashes below the current BCRYPT_ROUNDS without delaying the login
+    task = asyncio.create_task(_rehash_password(user.id, user.password_hash, login_data.password_bytes, db))
+    _rehash_tasks.add(task)
+    task.add_done_callback(_rehash_tasks.discard)
+    
     # Update last login time
     await db.users.update_one(
         {"id": user.id},
         {"$set": {"last_login_at": datetime.utcnow()}}
     )
+    invalidate_user_cache(user.id)
     
     # Create access token
     access_token = create_access_token(
@@ -112,7 +145,7 @@ async def authenticate_user(
     return user, token
 
 
-async def get_user_by_id(user_id: str, db: AsyncIOMotorDatabase) -> Optional[UserInDB]:
+async def get_user_by_id(user_id: str, db: AsyncDatabase) -> Optional[UserInDB]:
     """
     Get user by ID
     
@@ -123,7 +156,7 @@ async def get_user_by_id(user_id: str, db: AsyncIOMotorDatabase) -> Optional[Use
     Returns:
         User data or None if not found
     """
-    user_dict = await db.users.find_one({"id": user_id})
+    user_dict = await db.users.find_one({"id": user_id}, projection=USER_IN_DB_PROJECTION)
     
     if user_dict:
         return UserInDB(**user_dict)
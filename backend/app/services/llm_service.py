@@ -2,13 +2,183 @@
 LLM Service for generating treatment advice using OpenRouter API
 """
 import os
+import re
 import json
+import time
+import random
 import asyncio
-import requests
-from typing import Dict, Optional
-from datetime import datetime, timedelta
+import hashlib
+import httpx
+import logging
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional
 from app.config import settings
 
+try:
+    from diskcache import Cache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+_SYSTEM_PROMPT = """You are an expert agricultural advisor helping Indian farmers treat crop diseases. 
+Provide clear, practical, and affordable advice in simple language suitable for farmers with limited resources.
+Focus on actionable steps, local remedies, and cost-effective solutions.
+Be concise, direct, and farmer-friendly. Avoid overly technical jargon."""
+
+# Language code -> name used in the prompt
+_LANG_NAMES = {
+    "en": "English",
+    "hi": "Hindi",
+    "ta": "Tamil",
+    "te": "Telugu",
+    "kn": "Kannada",
+    "mr": "Marathi"
+}
+
+# Below this ML confidence (%) the LLM is skipped and the knowledge-base advice is returned
+LOW_CONFIDENCE_THRESHOLD = 50.0
+
+# Transient OpenRouter statuses worth retrying, and the backoff bounds (seconds)
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 10.0
+
+# Section headers such as "1. SUMMARY", "## Treatment Plan" or "**Urgency:** High"
+HEADER_RE = re.compile(
+    r'^(?:[#*]+\s*)?(?:\d+[.)]\s*)?\**\s*'
+    r'(summary|immediate|treatment|prevention|timeline|cost|urgency)\b',
+    re.I
+)
+# Leading bullet markers and numbering ("- ", "• ", "3. ")
+BULLET_RE = re.compile(r'^[\-\*•\d\.\s]+')
+# Treatment sub-sections ("Chemical options:", "- Organic options: Neem oil ...")
+SUB_RE = re.compile(r'^(chemical|organic)\b', re.I)
+
+
+def _header_tail(rest: str) -> str:
+    """Text after the colon of a header line ("Timeline: 2-3 weeks" -> "2-3 weeks")"""
+    _, sep, tail = rest.partition(':')
+    return tail.strip(' *') if sep else ''
+
+
+def _text_handler(field: str):
+    """Handler that appends every line of a section to a text field"""
+    def handle(result: Dict, line: str, section: str) -> str:
+        result[field] += line + ' '
+        return section
+    return handle
+
+
+def _bullet_handler(field: str):
+    """Handler that collects the bulleted/numbered lines of a section into a list"""
+    def handle(result: Dict, line: str, section: str) -> str:
+        bullet = BULLET_RE.match(line)
+        if bullet:
+            clean_line = line[bullet.end():]
+            if clean_line:
+                result[field].append(clean_line)
+        return section
+    return handle
+
+
+def _handle_treatment(result: Dict, line: str, section: str) -> str:
+    """Switch between chemical/organic sub-sections and collect their bullets"""
+    bullet = BULLET_RE.match(line)
+    clean_line = line[bullet.end():] if bullet else line
+    
+    sub = SUB_RE.match(clean_line)
+    if sub:
+        kind = sub.group(1).lower()
+        tail = _header_tail(clean_line[sub.end():])
+        if tail:
+            result['treatment_plan'][kind].append(tail)
+        return 'treatment_' + kind
+    
+    if bullet and clean_line and section != 'treatment':
+        result['treatment_plan'][section[len('treatment_'):]].append(clean_line)
+    return section
+
+
+def _handle_urgency(result: Dict, line: str, section: str) -> str:
+    """Map the urgency text onto low/medium/high/critical"""
+    urgency_text = line.lower()
+    if 'critical' in urgency_text or 'very high' in urgency_text:
+        result['urgency'] = 'critical'
+    elif 'high' in urgency_text:
+        result['urgency'] = 'high'
+    elif 'low' in urgency_text:
+        result['urgency'] = 'low'
+    else:
+        result['urgency'] = 'medium'
+    return section
+
+
+def _confidence_bucket(confidence: float) -> int:
+    """Round confidence to the nearest 10% so small jitter maps to the same prompt/cache entry"""
+    # Half-up (confidence is non-negative); round() would send 45 to 40 but 55 to 60
+    return int(confidence / 10 + 0.5) * 10
+
+
+@lru_cache(maxsize=256)
+def _build_user_prompt(
+    disease_name: str,
+    crop_type: str,
+    context: str,
+    confidence_bucket: int,
+    language: str
+) -> str:
+    """Format the user prompt (memoized, all arguments come from the cache key or RAG context)"""
+    language_name = _LANG_NAMES.get(language, "English")
+    
+    return f"""A farmer in India has detected {disease_name} in their {crop_type} crop with approximately {confidence_bucket}% confidence.
+
+Agricultural Database Information:
+{context}
+
+Please provide treatment advice in {language_name} language with the following structure:
+
+1. SUMMARY (2-3 sentences): Brief explanation of the disease and what it means for the farmer
+2. IMMEDIATE ACTIONS (3-5 steps): Practical steps the farmer should take right now
+3. TREATMENT PLAN:
+   - Chemical options: Specific products with dosages in simple terms
+   - Organic options: Natural/traditional remedies available locally
+4. PREVENTION TIPS (3-5 tips): How to prevent this in future crops
+5. TIMELINE: Expected time for recovery/improvement
+6. COST ESTIMATE: Approximate cost range in Indian Rupees
+7. URGENCY: Low/Medium/High/Critical
+
+Keep advice practical, affordable, and easy to understand. Use simple language that farmers can follow.
+Include local product names where applicable. Focus on what's available in Indian agricultural markets."""
+
+
+def _iter_lines(text: str):
+    """Yield lines one at a time without building the full split() list"""
+    pos = 0
+    while True:
+        nl = text.find('\n', pos)
+        if nl == -1:
+            yield text[pos:]
+            return
+        yield text[pos:nl]
+        pos = nl + 1
+
+
+_SECTION_HANDLERS = {
+    'summary': _text_handler('summary'),
+    'immediate': _bullet_handler('immediate_actions'),
+    'treatment': _handle_treatment,
+    'treatment_chemical': _handle_treatment,
+    'treatment_organic': _handle_treatment,
+    'prevention': _bullet_handler('prevention_tips'),
+    'timeline': _text_handler('timeline'),
+    'cost': _text_handler('cost_estimate'),
+    'urgency': _handle_urgency,
+}
+
 
 class LLMService:
     """Service for generating AI-powered treatment advice using OpenRouter API"""
@@ -20,21 +190,50 @@ class LLMService:
         self.base_url = "https://openrouter.ai/api/v1"
         
         if self.api_key:
-            print(f"✓ LLM Service initialized with model: {self.model}")
-            print(f"✓ API Key configured: {self.api_key[:20]}...")
+            logger.info("✓ LLM Service initialized with model: %s (API key configured)", self.model)
         else:
-            print("⚠️  OPENROUTER_API_KEY not set - LLM service will use fallback mode")
+            logger.warning("⚠️  OPENROUTER_API_KEY not set - LLM service will use fallback mode")
+        
+        # Shared HTTP client so OpenRouter calls reuse keep-alive connections
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=30,
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "HTTP-Referer": "http://localhost:8080",
+                "X-Title": "KrishiLok Agricultural Assistant",
+                "Content-Type": "application/json"
+            },
+            # retries=3 re-attempts failed connections; HTTP 429/5xx retries are in _call_openrouter_api
+            transport=httpx.AsyncHTTPTransport(
+                retries=3,
+                limits=httpx.Limits(
+                    max_keepalive_connections=20,
+                    max_connections=100,
+                    keepalive_expiry=60
+                )
+            )
+        )
+        
+        # Response cache: on disk when diskcache is installed (survives restarts),
+        # otherwise an in-memory LRU with TTL (oldest entries first)
+        self.cache_duration = 24 * 60 * 60  # seconds
+        self.cache_max_entries = 100
+        self.cache: "OrderedDict[str, tuple]" = OrderedDict()  # {cache_key: (response, monotonic timestamp)}
+        self.disk_cache = None
+        if DISKCACHE_AVAILABLE:
+            try:
+                self.disk_cache = Cache(settings.LLM_CACHE_DIR, size_limit=64 << 20)
+                logger.info("✓ LLM response cache persisted at: %s", settings.LLM_CACHE_DIR)
+            except Exception as e:
+                logger.warning("⚠️  Could not open LLM disk cache, using memory cache: %s", e)
         
-        # Response cache (simple in-memory cache)
-        self.cache: Dict[str, tuple] = {}  # {disease_name: (response, timestamp)}
-        self.cache_duration = timedelta(hours=24)
+        # Requests currently being generated, so concurrent duplicates share one API call
+        self._inflight: Dict[str, asyncio.Future] = {}
     
     def _get_system_prompt(self) -> str:
         """Get system prompt for the LLM"""
-        return """You are an expert agricultural advisor helping Indian farmers treat crop diseases. 
-Provide clear, practical, and affordable advice in simple language suitable for farmers with limited resources.
-Focus on actionable steps, local remedies, and cost-effective solutions.
-Be concise, direct, and farmer-friendly. Avoid overly technical jargon."""
+        return _SYSTEM_PROMPT
     
     def _get_user_prompt(
         self, 
@@ -45,62 +244,25 @@ Be concise, direct, and farmer-friendly. Avoid overly technical jargon."""
         language: str = "en"
     ) -> str:
         """Create user prompt with disease context"""
-        
-        # Language mapping
-        lang_names = {
-            "en": "English",
-            "hi": "Hindi",
-            "ta": "Tamil",
-            "te": "Telugu",
-            "kn": "Kannada",
-            "mr": "Marathi"
-        }
-        language_name = lang_names.get(language, "English")
-        
-        prompt = f"""A farmer in India has detected {disease_name} in their {crop_type} crop with {confidence:.1f}% confidence.
-
-Agricultural Database Information:
-{context}
-
-Please provide treatment advice in {language_name} language with the following structure:
-
-1. SUMMARY (2-3 sentences): Brief explanation of the disease and what it means for the farmer
-2. IMMEDIATE ACTIONS (3-5 steps): Practical steps the farmer should take right now
-3. TREATMENT PLAN:
-   - Chemical options: Specific products with dosages in simple terms
-   - Organic options: Natural/traditional remedies available locally
-4. PREVENTION TIPS (3-5 tips): How to prevent this in future crops
-5. TIMELINE: Expected time for recovery/improvement
-6. COST ESTIMATE: Approximate cost range in Indian Rupees
-7. URGENCY: Low/Medium/High/Critical
-
-Keep advice practical, affordable, and easy to understand. Use simple language that farmers can follow.
-Include local product names where applicable. Focus on what's available in Indian agricultural markets."""
-        
-        return prompt
+        return _build_user_prompt(
+            disease_name, crop_type, context, _confidence_bucket(confidence), language
+        )
     
-    def _call_openrouter_api_sync(
+    async def _call_openrouter_api(
         self, 
         system_prompt: str, 
-        user_prompt: str
+        user_prompt: str,
+        max_retries: int = 3
     ) -> Optional[str]:
         """
-        Call OpenRouter API using requests library (compatible with all versions)
+        Call OpenRouter chat completions API using the shared async client
         """
         if not self.api_key:
-            print("❌ No API key available")
+            logger.error("❌ No API key available")
             return None
         
         try:
-            print(f"🔄 Calling OpenRouter API with model: {self.model}")
-            
-            url = f"{self.base_url}/chat/completions"
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "HTTP-Referer": "http://localhost:8080",
-                "X-Title": "KrishiLok Agricultural Assistant",
-                "Content-Type": "application/json"
-            }
+            logger.debug("🔄 Calling OpenRouter API with model: %s", self.model)
             
             payload = {
                 "model": self.model,
@@ -110,41 +272,50 @@ Include local product names where applicable. Focus on what's available in India
                 ]
             }
             
-            response = requests.post(url, headers=headers, json=payload, timeout=30)
+            for attempt in range(max_retries + 1):
+                response = await self.client.post("/chat/completions", json=payload)
+                if response.status_code not in RETRY_STATUS_CODES or attempt == max_retries:
+                    break
+                
+                delay = self._retry_delay(response, attempt)
+                logger.warning(
+                    "⏳ OpenRouter returned %d, retrying in %.1fs (%d/%d)",
+                    response.status_code, delay, attempt + 1, max_retries
+                )
+                await asyncio.sleep(delay)
             
             if response.status_code == 200:
                 data = response.json()
                 content = data['choices'][0]['message']['content']
-                print(f"✓ OpenRouter API SUCCESS - Got {len(content)} chars")
-                print(f"📝 First 100 chars: {content[:100]}...")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("✓ OpenRouter API SUCCESS - Got %d chars, preview: %s...",
+                                 len(content), content[:100])
                 return content
             else:
-                print(f"❌ OpenRouter API error {response.status_code}: {response.text}")
+                logger.error("❌ OpenRouter API error %d: %s", response.status_code, response.text)
                 return None
             
         except Exception as e:
-            print(f"❌ OpenRouter API error: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ OpenRouter API error: %s", e)
             return None
     
-    async def _call_openrouter_api(
-        self, 
-        system_prompt: str, 
-        user_prompt: str,
-        max_retries: int = 3
-    ) -> Optional[str]:
-        """
-        Async wrapper for OpenRouter API call
-        """
-        # Run sync function in executor to make it async
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            None, 
-            self._call_openrouter_api_sync,
-            system_prompt,
-            user_prompt
-        )
+    @staticmethod
+    def _retry_delay(response: httpx.Response, attempt: int) -> float:
+        """Backoff before the next attempt: Retry-After if given, else exponential with jitter"""
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(float(retry_after), RETRY_MAX_DELAY)
+            except ValueError:
+                pass  # HTTP-date form, fall back to exponential backoff
+        delay = RETRY_BASE_DELAY * (2 ** attempt)
+        return min(delay + random.uniform(0, delay / 2), RETRY_MAX_DELAY)
+    
+    async def aclose(self):
+        """Close the shared HTTP client and disk cache (application shutdown)"""
+        await self.client.aclose()
+        if self.disk_cache is not None:
+            self.disk_cache.close()
     
     def _parse_llm_response(self, llm_text: str, disease_info: Dict) -> Dict:
         """
@@ -175,93 +346,24 @@ Include local product names where applicable. Focus on what's available in India
         if not llm_text:
             return result
         
-        # Simple parsing (split by sections)
-        lines = llm_text.split('\n')
+        # Single pass: classify header lines, hand other lines to the current section
         current_section = None
         
-        for line in lines:
+        for line in _iter_lines(llm_text):
             line = line.strip()
             if not line:
                 continue
             
-            # Detect sections
-            line_lower = line.lower()
-            
-            if 'summary' in line_lower or line.startswith('1.'):
-                current_section = 'summary'
-                continue
-            elif 'immediate' in line_lower or line.startswith('2.'):
-                current_section = 'immediate'
-                continue
-            elif 'treatment' in line_lower or line.startswith('3.'):
-                current_section = 'treatment'
-                continue
-            elif 'prevention' in line_lower or line.startswith('4.'):
-                current_section = 'prevention'
-                continue
-            elif 'timeline' in line_lower or line.startswith('5.'):
-                current_section = 'timeline'
-                continue
-            elif 'cost' in line_lower or line.startswith('6.'):
-                current_section = 'cost'
-                continue
-            elif 'urgency' in line_lower or line.startswith('7.'):
-                current_section = 'urgency'
-                continue
-            
-            # Extract content based on section
-            if current_section == 'summary' and not line.startswith(('1.', '#')):
-                result['summary'] += line + ' '
-            
-            elif current_section == 'immediate':
-                if line.startswith(('-', '•', '*')) or line[0].isdigit():
-                    clean_line = line.lstrip('-•*0123456789. ')
-                    if clean_line:
-                        result['immediate_actions'].append(clean_line)
-            
-            elif current_section == 'treatment':
-                if 'chemical' in line_lower:
-                    current_section = 'treatment_chemical'
-                elif 'organic' in line_lower:
-                    current_section = 'treatment_organic'
-            
-            elif current_section == 'treatment_chemical':
-                if line.startswith(('-', '•', '*')) or line[0].isdigit():
-                    clean_line = line.lstrip('-•*0123456789. ')
-                    if clean_line and 'organic' not in clean_line.lower():
-                        result['treatment_plan']['chemical'].append(clean_line)
+            header = HEADER_RE.match(line)
+            if header:
+                current_section = header.group(1).lower()
+                # Keep inline content such as "Urgency: High"
+                line = _header_tail(line[header.end():])
+                if not line:
+                    continue
             
-            elif current_section == 'treatment_organic':
-                if line.startswith(('-', '•', '*')) or line[0].isdigit():
-                    clean_line = line.lstrip('-•*0123456789. ')
-                    if clean_line:
-                        result['treatment_plan']['organic'].append(clean_line)
-            
-            elif current_section == 'prevention':
-                if line.startswith(('-', '•', '*')) or line[0].isdigit():
-                    clean_line = line.lstrip('-•*0123456789. ')
-                    if clean_line:
-                        result['prevention_tips'].append(clean_line)
-            
-            elif current_section == 'timeline':
-                if not line.startswith(('5.', '#', 'Timeline')):
-                    result['timeline'] += line + ' '
-            
-            elif current_section == 'cost':
-                if not line.startswith(('6.', '#', 'Cost')):
-                    result['cost_estimate'] += line + ' '
-            
-            elif current_section == 'urgency':
-                if not line.startswith(('7.', '#', 'Urgency')):
-                    urgency_text = line.lower()
-                    if 'critical' in urgency_text or 'very high' in urgency_text:
-                        result['urgency'] = 'critical'
-                    elif 'high' in urgency_text:
-                        result['urgency'] = 'high'
-                    elif 'low' in urgency_text:
-                        result['urgency'] = 'low'
-                    else:
-                        result['urgency'] = 'medium'
+            if current_section is not None:
+                current_section = _SECTION_HANDLERS[current_section](result, line, current_section)
         
         # Clean up
         result['summary'] = result['summary'].strip()
@@ -280,12 +382,42 @@ Include local product names where applicable. Focus on what's available in India
         
         return result
     
+    @staticmethod
+    def cache_key_for(
+        disease_name: str,
+        crop_type: str,
+        context: str,
+        confidence: float,
+        language: str
+    ) -> str:
+        """
+        Cache key for an advice request
+        
+        Includes a hash of the RAG context so editing the knowledge base
+        invalidates advice persisted in the disk cache.
+        """
+        context_hash = hashlib.blake2b(context.encode("utf-8"), digest_size=8).hexdigest()
+        return f"{crop_type}|{disease_name}|{_confidence_bucket(confidence)}|{language}|{context_hash}"
+    
+    def is_cached(self, cache_key: str) -> bool:
+        """Whether advice for cache_key is cached and still valid"""
+        return self._check_cache(cache_key) is not None
+    
     def _check_cache(self, cache_key: str) -> Optional[Dict]:
         """Check if response is cached and still valid"""
-        if cache_key in self.cache:
-            response, timestamp = self.cache[cache_key]
-            if datetime.now() - timestamp < self.cache_duration:
-                print(f"✓ Using cached response for: {cache_key}")
+        if self.disk_cache is not None:
+            # diskcache drops expired entries itself
+            response = self.disk_cache.get(cache_key)
+            if response is not None:
+                logger.debug("✓ Using cached response for: %s", cache_key)
+            return response
+        
+        entry = self.cache.get(cache_key)
+        if entry is not None:
+            response, timestamp = entry
+            if time.monotonic() - timestamp < self.cache_duration:
+                self.cache.move_to_end(cache_key)
+                logger.debug("✓ Using cached response for: %s", cache_key)
                 return response
             else:
                 # Cache expired
@@ -294,12 +426,16 @@ Include local product names where applicable. Focus on what's available in India
     
     def _update_cache(self, cache_key: str, response: Dict):
         """Update cache with new response"""
-        self.cache[cache_key] = (response, datetime.now())
+        if self.disk_cache is not None:
+            self.disk_cache.set(cache_key, response, expire=self.cache_duration)
+            return
         
-        # Limit cache size (keep last 100 entries)
-        if len(self.cache) > 100:
-            oldest_key = min(self.cache.keys(), key=lambda k: self.cache[k][1])
-            del self.cache[oldest_key]
+        self.cache[cache_key] = (response, time.monotonic())
+        self.cache.move_to_end(cache_key)
+        
+        # Limit cache size (evict least recently used entries)
+        while len(self.cache) > self.cache_max_entries:
+            self.cache.popitem(last=False)
     
     async def generate_treatment_advice(
         self,
@@ -308,7 +444,8 @@ Include local product names where applicable. Focus on what's available in India
         context: str,
         confidence: float,
         disease_info: Optional[Dict] = None,
-        language: str = "en"
+        language: str = "en",
+        localized_disease_info: Optional[Dict] = None
     ) -> Dict:
         """
         Generate AI-powered treatment advice using OpenRouter API
@@ -320,16 +457,61 @@ Include local product names where applicable. Focus on what's available in India
             confidence: ML model confidence score
             disease_info: Raw disease information for fallback
             language: Target language code (en, hi, ta, te, kn, mr)
+            localized_disease_info: Pre-translated knowledge base entry for language,
+                used by the fallbacks instead of translating at request time
         
         Returns:
             Dictionary with structured treatment advice
         """
+        # Low-confidence detections: detailed advice would be unreliable, skip the API call
+        if confidence < LOW_CONFIDENCE_THRESHOLD:
+            return self._create_low_confidence_response(
+                disease_name, disease_info or {}, language, localized_disease_info
+            )
+        
         # Check cache first
-        cache_key = f"{disease_name}_{language}"
+        cache_key = self.cache_key_for(disease_name, crop_type, context, confidence, language)
         cached_response = self._check_cache(cache_key)
         if cached_response:
             return cached_response
         
+        # Join an identical request that is already waiting on the API
+        inflight = self._inflight.get(cache_key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[cache_key] = future
+        try:
+            result = await self._generate_advice(
+                cache_key, disease_name, crop_type, context, confidence, disease_info, language,
+                localized_disease_info
+            )
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark as retrieved so asyncio doesn't warn when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(cache_key, None)
+    
+    async def _generate_advice(
+        self,
+        cache_key: str,
+        disease_name: str,
+        crop_type: str,
+        context: str,
+        confidence: float,
+        disease_info: Optional[Dict],
+        language: str,
+        localized_disease_info: Optional[Dict] = None
+    ) -> Dict:
+        """Build prompts, call the API and parse/translate/cache the advice (cache miss path)"""
         # Create prompts
         system_prompt = self._get_system_prompt()
         user_prompt = self._get_user_prompt(disease_name, crop_type, context, confidence, language)
@@ -348,12 +530,15 @@ Include local product names where applicable. Focus on what's available in India
             # Cache successful response
             self._update_cache(cache_key, result)
             
-            print(f"✓ Generated AI advice for: {disease_name} ({language})")
+            logger.info("✓ Generated AI advice for: %s (%s)", disease_name, language)
             return result
         
         else:
             # Fallback: Use RAG knowledge base only
-            print(f"⚠️  LLM failed, using RAG fallback for: {disease_name}")
+            logger.warning("⚠️  LLM failed, using RAG fallback for: %s", disease_name)
+            if language in ["ta", "kn"] and localized_disease_info:
+                return self._create_fallback_response(localized_disease_info)
+            
             fallback = self._create_fallback_response(disease_info or {})
             
             # Translate fallback if needed
@@ -362,18 +547,56 @@ Include local product names where applicable. Focus on what's available in India
             
             return fallback
     
-    def _translate_response(self, response: Dict, src_lang: str, tgt_lang: str) -> Dict:
+    def _create_low_confidence_response(
+        self,
+        disease_name: str,
+        disease_info: Dict,
+        language: str,
+        localized_disease_info: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Knowledge-base advice flagged for confirmation (cached so repeats skip translation)
+        """
+        cache_key = f"fallback|{disease_name}|{language}"
+        cached_response = self._check_cache(cache_key)
+        if cached_response:
+            return cached_response
+        
+        logger.info("⚠️  Low confidence for %s, using RAG advice without LLM", disease_name)
+        localized = language in ["ta", "kn"] and bool(localized_disease_info)
+        fallback = self._create_fallback_response(localized_disease_info if localized else disease_info)
+        fallback["summary"] = (
+            f"Low confidence detection: possibly {disease_info.get('disease_name', disease_name)}. "
+            "Please confirm with a clearer photo or a local agricultural expert before treating."
+        )
+        
+        if language != "en" and language in ["ta", "kn"]:
+            # Only the summary still needs translating when the entry was pre-translated
+            fields = ["summary"] if localized else None
+            fallback = self._translate_response(fallback, "en", language, fields)
+        
+        self._update_cache(cache_key, fallback)
+        return fallback
+    
+    def _translate_response(
+        self,
+        response: Dict,
+        src_lang: str,
+        tgt_lang: str,
+        fields: Optional[List[str]] = None
+    ) -> Dict:
         """Translate AI response to target language"""
         try:
             from app.services import translation_service
             if translation_service.translation_service:
                 # Fields to translate
-                fields = ["summary", "immediate_actions", "prevention_tips", "timeline", "cost_estimate"]
+                if fields is None:
+                    fields = ["summary", "immediate_actions", "prevention_tips", "timeline", "cost_estimate"]
                 return translation_service.translation_service.translate_dict(
                     response, fields, src_lang, tgt_lang
                 )
         except Exception as e:
-            print(f"⚠️ Translation failed: {e}")
+            logger.warning("⚠️ Translation failed: %s", e)
         
         return response
     
@@ -3,17 +3,37 @@ Machine Learning service for crop disease detection
 Uses EfficientNet-B3 models trained on crop-specific datasets
 """
 import os
+import asyncio
+import inspect
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import torch
 import torch.nn as nn
 from torchvision import transforms
+from torchvision.io import ImageReadMode, decode_jpeg, read_file
+from torchvision.transforms.functional import pil_to_tensor
 from PIL import Image
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import timm
 from pathlib import Path
 import logging
+from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Dynamic batching: concurrent predictions for the same crop within
+# BATCH_WINDOW seconds share one forward pass (up to MAX_BATCH_SIZE images)
+MAX_BATCH_SIZE = 8
+BATCH_WINDOW = 0.01  # seconds
+
+# torch.load(mmap=True) needs PyTorch >= 2.1; older versions read the whole file
+_TORCH_LOAD_SUPPORTS_MMAP = "mmap" in inspect.signature(torch.load).parameters
+
+# Number of classes reported in "all_predictions"
+TOP_K_PREDICTIONS = 5
+
+# Threads for image decoding/preprocessing and forward passes (kept off the event loop)
+INFERENCE_WORKERS = min(4, os.cpu_count() or 1)
+
 
 class DiseaseDetectionService:
     """
@@ -30,6 +50,9 @@ class DiseaseDetectionService:
         """
         self.models_dir = Path(models_dir)
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        if self.device.type == "cuda":
+            # Input shapes are fixed (224x224), so let cuDNN pick and cache the fastest kernels
+            torch.backends.cudnn.benchmark = True
         
         # Supported crop types
         self.supported_crops = ["chilli", "groundnut", "rice"]
@@ -38,11 +61,24 @@ class DiseaseDetectionService:
         self.models: Dict[str, nn.Module] = {}
         self.class_names: Dict[str, List[str]] = {}
         
-        # Image preprocessing pipeline
+        # Per-crop batching queues and their worker tasks (started on first predict)
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        
+        # Dedicated pool so inference doesn't compete with the default executor
+        self._executor = ThreadPoolExecutor(
+            max_workers=INFERENCE_WORKERS, thread_name_prefix="ml-inference"
+        )
+        
+        # Side stream for host-to-device copies/preprocessing, so the next batch's
+        # inputs are prepared while the current batch runs on the default stream
+        self._copy_stream = torch.cuda.Stream() if self.device.type == "cuda" else None
+        
+        # Image preprocessing pipeline (runs on uint8 image tensors on self.device)
         self.transform = transforms.Compose([
-            transforms.Resize(256),
+            transforms.ConvertImageDtype(torch.float32),
+            transforms.Resize(256, antialias=True),
             transforms.CenterCrop(224),
-            transforms.ToTensor(),
             transforms.Normalize(
                 mean=[0.485, 0.456, 0.406],  # ImageNet stats
                 std=[0.229, 0.224, 0.225]
@@ -53,71 +89,136 @@ class DiseaseDetectionService:
         self._load_models()
         
     def _load_models(self):
-        """Load all crop disease detection models"""
+        """Load all crop disease detection models (in parallel, one thread per crop)"""
         logger.info(f"🔍 Loading disease detection models...")
         logger.info(f"📱 Device: {self.device}")
         
-        for crop in self.supported_crops:
-            try:
-                # Load class names
-                classes_file = self.models_dir / f"{crop}_classes.txt"
-                with open(classes_file, 'r') as f:
-                    class_names = [line.strip() for line in f.readlines()]
-                self.class_names[crop] = class_names
-                
-                # Create model architecture
-                num_classes = len(class_names)
-                model = self._create_model(num_classes)
-                
-                # Load trained weights
-                model_file = self.models_dir / f"{crop}_model_best.pth"
-                
-                if not model_file.exists():
-                    logger.warning(f"⚠️  Model file not found: {model_file}")
-                    logger.warning(f"⚠️  {crop.upper()} model will not be available")
-                    continue
-                
-                # Load state dict
+        # torch.load file I/O and tensor copies release the GIL, so threads overlap
+        with ThreadPoolExecutor(max_workers=len(self.supported_crops)) as executor:
+            futures = {
+                executor.submit(self._load_one_crop, crop): crop
+                for crop in self.supported_crops
+            }
+            for future in as_completed(futures):
+                crop = futures[future]
                 try:
-                    state_dict = torch.load(model_file, map_location=self.device)
-                    
-                    # Check if state_dict has 'backbone.' prefix (trained with wrapper)
-                    if any(key.startswith('backbone.') for key in state_dict.keys()):
-                        logger.info(f"🔧 Detected 'backbone.' prefix in {crop} model, stripping prefix...")
-                        # Remove 'backbone.' prefix from all keys
-                        new_state_dict = {}
-                        for key, value in state_dict.items():
-                            if key.startswith('backbone.'):
-                                new_key = key.replace('backbone.', '', 1)
-                                new_state_dict[new_key] = value
-                            else:
-                                new_state_dict[key] = value
-                        state_dict = new_state_dict
-                    
-                    model.load_state_dict(state_dict)
-                    logger.info(f"✓ Loaded {crop} model from {model_file}")
+                    class_names, model = future.result()
                 except Exception as e:
-                    logger.error(f"❌ Failed to load {crop} model weights: {str(e)}")
-                    # Try loading with strict=False as fallback
-                    try:
-                        model.load_state_dict(state_dict, strict=False)
-                        logger.warning(f"⚠️  Loaded {crop} model with strict=False - MODEL MAY NOT WORK PROPERLY")
-                    except:
-                        logger.error(f"❌ Could not load {crop} model even with strict=False")
-                        continue
-                
-                # Move to device and set to eval mode
-                model = model.to(self.device)
-                model.eval()
-                
-                self.models[crop] = model
-                logger.info(f"✓ {crop.upper()} model ready ({num_classes} classes)")
+                    logger.error(f"❌ Error loading {crop} model: {str(e)}")
+                    continue
                 
-            except Exception as e:
-                logger.error(f"❌ Error loading {crop} model: {str(e)}")
+                self.class_names[crop] = class_names
+                if model is not None:
+                    self.models[crop] = model
         
         logger.info(f"✅ Loaded {len(self.models)}/{len(self.supported_crops)} models successfully")
         
+        self._warmup_models()
+    
+    def _warmup_models(self):
+        """
+        Run dummy forward passes so the first real requests don't pay for
+        cuDNN autotuning, workspace allocation or torch.compile
+        """
+        for crop in list(self.models):
+            try:
+                for batch_size in sorted({1, MAX_BATCH_SIZE}):
+                    dummy = torch.zeros(3, 224, 224, device=self.device)
+                    self._infer_sync(crop, [dummy] * batch_size)
+                logger.info(f"🔥 {crop.upper()} model warmed up")
+            except Exception as e:
+                logger.warning(f"⚠️  Warmup failed for {crop} model: {str(e)}")
+                # torch.compile wraps the module; fall back to the eager original
+                eager_model = getattr(self.models[crop], "_orig_mod", None)
+                if eager_model is not None:
+                    self.models[crop] = eager_model
+                    logger.warning(f"⚠️  Using eager mode for {crop} model")
+    
+    def _load_one_crop(self, crop: str) -> Tuple[List[str], Optional[nn.Module]]:
+        """
+        Load class names and trained weights for one crop (loader thread)
+        
+        Returns:
+            (class_names, model), with model None if its weights are unavailable
+        """
+        # Load class names
+        classes_file = self.models_dir / f"{crop}_classes.txt"
+        with open(classes_file, 'r') as f:
+            class_names = [line.strip() for line in f.readlines()]
+        
+        # Create model architecture
+        num_classes = len(class_names)
+        model = self._create_model(num_classes)
+        
+        # Load trained weights
+        model_file = self.models_dir / f"{crop}_model_best.pth"
+        
+        if not model_file.exists():
+            logger.warning(f"⚠️  Model file not found: {model_file}")
+            logger.warning(f"⚠️  {crop.upper()} model will not be available")
+            return class_names, None
+        
+        # Load state dict
+        try:
+            # Load tensors only (no arbitrary pickle) onto the CPU; the model
+            # is moved to self.device once, below
+            load_kwargs = {"map_location": "cpu", "weights_only": True}
+            if _TORCH_LOAD_SUPPORTS_MMAP:
+                load_kwargs["mmap"] = True
+            state_dict = torch.load(model_file, **load_kwargs)
+            
+            # Check if state_dict has 'backbone.' prefix (trained with wrapper)
+            if any(key.startswith('backbone.') for key in state_dict.keys()):
+                logger.info(f"🔧 Detected 'backbone.' prefix in {crop} model, stripping prefix...")
+                # Remove 'backbone.' prefix from all keys
+                new_state_dict = {}
+                for key, value in state_dict.items():
+                    if key.startswith('backbone.'):
+                        new_key = key.replace('backbone.', '', 1)
+                        new_state_dict[new_key] = value
+                    else:
+                        new_state_dict[key] = value
+                state_dict = new_state_dict
+            
+            model.load_state_dict(state_dict)
+            logger.info(f"✓ Loaded {crop} model from {model_file}")
+        except Exception as e:
+            logger.error(f"❌ Failed to load {crop} model weights: {str(e)}")
+            # Try loading with strict=False as fallback
+            try:
+                model.load_state_dict(state_dict, strict=False)
+                logger.warning(f"⚠️  Loaded {crop} model with strict=False - MODEL MAY NOT WORK PROPERLY")
+            except:
+                logger.error(f"❌ Could not load {crop} model even with strict=False")
+                return class_names, None
+        
+        # Move to device (channels_last suits the conv layers) and set to eval mode
+        model = model.to(self.device, memory_format=torch.channels_last)
+        model.eval()
+        
+        if settings.TORCH_COMPILE_MODELS:
+            model = self._compile_model(model, crop)
+        
+        logger.info(f"✓ {crop.upper()} model ready ({num_classes} classes)")
+        return class_names, model
+    
+    def _compile_model(self, model: nn.Module, crop: str) -> nn.Module:
+        """
+        Compile a model with torch.compile, falling back to eager mode
+        
+        Compilation happens on the first forward pass of each batch shape, so
+        backend errors surface during warmup, which then restores the eager model.
+        """
+        try:
+            # CUDA graphs ("reduce-overhead") only help on the GPU
+            mode = "reduce-overhead" if self.device.type == "cuda" else "default"
+            compiled = torch.compile(model, mode=mode, fullgraph=False)
+            logger.info(f"⚡ Compiled {crop} model with torch.compile (mode={mode})")
+            return compiled
+        except Exception as e:
+            logger.warning(f"⚠️  torch.compile unavailable for {crop} model, using eager mode: {str(e)}")
+            return model
+    
     def _create_model(self, num_classes: int) -> nn.Module:
         """
         Create EfficientNet-B3 model with custom classification head
@@ -178,65 +279,164 @@ class DiseaseDetectionService:
         
         try:
             # Load and preprocess image
-            image = Image.open(image_path).convert('RGB')
-            image_tensor = self.transform(image).unsqueeze(0)  # Add batch dimension
-            image_tensor = image_tensor.to(self.device)
+            loop = asyncio.get_running_loop()
+            image_tensor = await loop.run_in_executor(self._executor, self._preprocess_sync, image_path)
             
         except Exception as e:
             raise ValueError(f"Failed to load or preprocess image: {str(e)}")
         
         try:
-            # Run inference
-            model = self.models[crop_type]
+            # Run inference (batched with other concurrent requests for this crop)
+            probabilities = await self._submit(crop_type, image_tensor)
             
-            with torch.no_grad():
-                outputs = model(image_tensor)
-                probabilities = torch.nn.functional.softmax(outputs, dim=1)
-                confidence, predicted_idx = torch.max(probabilities, 1)
-                
-                # Get all predictions
-                all_probs = probabilities[0].cpu().numpy()
-                
-                # DEBUG: Log all class probabilities to detect if model is stuck
-                logger.debug(f"🔬 RAW OUTPUTS: {outputs[0].cpu().numpy()}")
-                logger.debug(f"🔬 ALL PROBABILITIES: {all_probs}")
-                
-            # Get class names
+            # DEBUG: Log all class probabilities to detect if model is stuck
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"🔬 ALL PROBABILITIES: {probabilities.tolist()}")
+            
+            # Top predictions, already sorted by confidence
             class_names = self.class_names[crop_type]
-            predicted_disease = class_names[predicted_idx.item()]
-            confidence_score = float(confidence.item() * 100)  # Convert to percentage
+            top_probs, top_idx = torch.topk(probabilities, k=min(TOP_K_PREDICTIONS, len(class_names)))
+            top_probs = top_probs.mul_(100).tolist()
+            top_idx = top_idx.tolist()
+            
+            predicted_disease = class_names[top_idx[0]]
+            confidence_score = top_probs[0]  # Percentage
             
-            # Create all predictions dictionary
             all_predictions = {
-                class_names[i]: float(all_probs[i] * 100)
-                for i in range(len(class_names))
+                class_names[i]: prob
+                for i, prob in zip(top_idx, top_probs)
             }
             
-            # Sort by confidence
-            all_predictions = dict(
-                sorted(all_predictions.items(), key=lambda x: x[1], reverse=True)
-            )
-            
             return {
                 "disease": predicted_disease,
                 "confidence": round(confidence_score, 2),
                 "all_predictions": all_predictions
             }
             
+        except RuntimeError as e:
+            raise RuntimeError(f"Model inference failed: {str(e)}")
+        
+        except Exception as e:
+            raise RuntimeError(f"Prediction failed: {str(e)}")
+    
+    def _preprocess_sync(self, image_path: str) -> torch.Tensor:
+        """Load and preprocess an image into a (C, H, W) model input (worker thread)"""
+        if self._copy_stream is not None and self.device.type == "cuda":
+            with torch.cuda.stream(self._copy_stream):
+                return self.transform(self._load_image(image_path))
+        return self.transform(self._load_image(image_path))
+    
+    def _load_image(self, image_path: str) -> torch.Tensor:
+        """
+        Decode an image file into a uint8 (3, H, W) tensor on self.device
+        
+        On CUDA, JPEGs are decoded directly on the GPU with nvJPEG. Other
+        formats (and JPEGs nvJPEG rejects) go through PIL, with the host
+        tensor pinned so the copy to the GPU is asynchronous.
+        """
+        if self.device.type == "cuda":
+            data = read_file(image_path)
+            if data.numel() > 2 and data[0] == 0xFF and data[1] == 0xD8:  # JPEG magic bytes
+                try:
+                    return decode_jpeg(data, mode=ImageReadMode.RGB, device=self.device)
+                except RuntimeError as e:
+                    logger.debug(f"nvJPEG decode failed, using PIL: {str(e)}")
+        
+        with Image.open(image_path) as image:
+            image_tensor = pil_to_tensor(image.convert('RGB'))
+        if self.device.type == "cuda":
+            image_tensor = image_tensor.pin_memory()
+        return image_tensor.to(self.device, non_blocking=True)
+    
+    async def _submit(self, crop_type: str, image_tensor: torch.Tensor) -> torch.Tensor:
+        """
+        Queue a preprocessed image for the crop's batch worker
+        
+        Args:
+            image_tensor: Preprocessed image (C, H, W)
+            
+        Returns:
+            Class probabilities for this image (CPU tensor)
+        """
+        queue = self._queues.get(crop_type)
+        if queue is None:
+            queue = self._queues[crop_type] = asyncio.Queue()
+            self._workers[crop_type] = asyncio.create_task(self._batch_worker(crop_type, queue))
+        
+        future = asyncio.get_running_loop().create_future()
+        queue.put_nowait((image_tensor, future))
+        return await future
+    
+    async def _batch_worker(self, crop_type: str, queue: asyncio.Queue):
+        """Background task: collect requests for BATCH_WINDOW, then run them as one batch"""
+        while True:
+            items = [await queue.get()]
+            if queue.qsize() < MAX_BATCH_SIZE - 1:
+                await asyncio.sleep(BATCH_WINDOW)
+            while len(items) < MAX_BATCH_SIZE and not queue.empty():
+                items.append(queue.get_nowait())
+            
+            try:
+                tensors = [tensor for tensor, _ in items]
+                probabilities = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, self._infer_sync, crop_type, tensors
+                )
+            except Exception as e:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, future), probs in zip(items, probabilities):
+                if not future.done():
+                    future.set_result(probs)
+    
+    def _infer_sync(self, crop_type: str, tensors: List[torch.Tensor]) -> torch.Tensor:
+        """
+        Stack preprocessed images and forward them through the crop model (worker thread)
+        
+        Returns:
+            Softmax probabilities (N, num_classes) on the CPU
+        """
+        model = self.models[crop_type]
+        try:
+            if self._copy_stream is not None and self.device.type == "cuda":
+                # Inputs were produced on the copy stream: wait for it, and tell the
+                # allocator they are now used on the compute stream
+                compute_stream = torch.cuda.current_stream()
+                compute_stream.wait_stream(self._copy_stream)
+                for tensor in tensors:
+                    tensor.record_stream(compute_stream)
+            
+            batch = torch.stack(tensors).to(self.device, memory_format=torch.channels_last, non_blocking=True)
+            use_fp16 = self.device.type == "cuda"
+            with torch.inference_mode(), torch.autocast(
+                device_type=self.device.type, dtype=torch.float16, enabled=use_fp16
+            ):
+                outputs = model(batch)
+            # Softmax in fp32 so low probabilities don't underflow
+            return torch.nn.functional.softmax(outputs.float(), dim=1).cpu()
+        
         except RuntimeError as e:
             # Handle CUDA out of memory errors
-            if "out of memory" in str(e).lower():
+            if "out of memory" in str(e).lower() and self.device.type != "cpu":
                 logger.warning("⚠️  CUDA out of memory, falling back to CPU")
                 self.device = torch.device("cpu")
-                # Move model to CPU
-                self.models[crop_type] = self.models[crop_type].to(self.device)
+                # Move all models to CPU so they match the new device
+                for crop, crop_model in self.models.items():
+                    self.models[crop] = crop_model.to(self.device, memory_format=torch.channels_last)
                 # Retry prediction
-                return await self.predict(image_path, crop_type)
-            else:
-                raise RuntimeError(f"Model inference failed: {str(e)}")
-        
-        except Exception as e:
-            raise RuntimeError(f"Prediction failed: {str(e)}")
+                return self._infer_sync(crop_type, tensors)
+            raise
+    
+    async def aclose(self):
+        """Stop the batch workers (application shutdown)"""
+        for worker in self._workers.values():
+            worker.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+        self._workers.clear()
+        self._queues.clear()
+        self._executor.shutdown(wait=False)
     
     def get_supported_crops(self) -> List[str]:
         """Get list of supported crop types"""
@@ -0,0 +1,85 @@
+"""
+Buffered notification writer
+Coalesces notification inserts from many requests into batched insert_many calls
+"""
+import asyncio
+from typing import List, Optional
+from pymongo.asynchronous.database import AsyncDatabase
+
+# Flush when this many notifications are buffered or FLUSH_INTERVAL has passed
+MAX_BATCH_SIZE = 500
+FLUSH_INTERVAL = 0.1  # seconds
+
+_queue: Optional[asyncio.Queue] = None
+_writer_task: Optional[asyncio.Task] = None
+
+
+async def _flush(db: AsyncDatabase, batch: List[dict]):
+    """Write a batch of notifications (unordered so one bad document doesn't block the rest)"""
+    if not batch:
+        return
+    try:
+        await db.notifications.insert_many(batch, ordered=False)
+    except Exception as e:
+        print(f"⚠️  Failed to write {len(batch)} notifications: {e}")
+
+
+async def _writer(db: AsyncDatabase, queue: asyncio.Queue):
+    """Background task: wait for a notification, gather more for FLUSH_INTERVAL, then flush"""
+    while True:
+        batch = [await queue.get()]
+        try:
+            await asyncio.sleep(FLUSH_INTERVAL)
+        finally:
+            # Runs on shutdown too, so a batch in progress is never dropped
+            while len(batch) < MAX_BATCH_SIZE and not queue.empty():
+                batch.append(queue.get_nowait())
+            await _flush(db, batch)
+
+
+def start_notification_writer(db: AsyncDatabase):
+    """Start the background notification writer (application startup)"""
+    global _queue, _writer_task
+    if _writer_task is not None:
+        return
+    _queue = asyncio.Queue()
+    _writer_task = asyncio.create_task(_writer(db, _queue))
+    print("✓ Notification writer started")
+
+
+async def stop_notification_writer(db: AsyncDatabase):
+    """Stop the writer and flush anything still buffered (application shutdown)"""
+    global _queue, _writer_task
+    if _writer_task is None:
+        return
+
+    _writer_task.cancel()
+    try:
+        await _writer_task
+    except asyncio.CancelledError:
+        pass
+
+    remaining = []
+    while not _queue.empty():
+        remaining.append(_queue.get_nowait())
+    for i in range(0, len(remaining), MAX_BATCH_SIZE):
+        await _flush(db, remaining[i:i + MAX_BATCH_SIZE])
+
+    _queue = None
+    _writer_task = None
+    print("✓ Notification writer stopped")
+
+
+async def enqueue_notification(notification: dict, db: AsyncDatabase):
+    """
+    Queue a notification for the next batched insert
+
+    Falls back to a direct insert when the writer isn't running
+    (e.g. scripts that use the services without the app lifespan).
+    Buffered notifications are written at most once: a crash before
+    the next flush loses them.
+    """
+    if _queue is None:
+        await db.notifications.insert_one(notification)
+        return
+    _queue.put_nowait(notification)
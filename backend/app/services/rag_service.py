@@ -1,18 +1,119 @@
 """
 RAG Service for retrieving disease information from knowledge base
 """
-import json
 import os
-from typing import Dict, Optional
+from collections.abc import Mapping
+from typing import Any, Dict, List, Optional, Tuple
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    # stdlib json also accepts bytes in loads()
+    import json as orjson
+
+try:
+    import simdjson
+    SIMDJSON_AVAILABLE = True
+except ImportError:
+    SIMDJSON_AVAILABLE = False
+
+
+# Pre-translated knowledge bases written by scripts/translate_kb.py
+LOCALIZED_LANGUAGES = ("ta", "kn")
+
+
+# LLM context layout; every block below is empty or ends with a newline
+_CONTEXT_TEMPLATE = (
+    "Disease: {header}\n"
+    "Crop: {crop}\n"
+    "Severity: {severity} | Spread Rate: {spread_rate}\n"
+    "\n"
+    "{symptoms}{causes}{treatment}{prevention}{additional}{note}"
+)
+
+# (treatment field, heading) in the order they appear in the context
+_TREATMENT_SECTIONS = (
+    ('immediate', "Immediate Actions"),
+    ('chemical', "Chemical Treatment"),
+    ('organic', "Organic Treatment"),
+    ('fertilizers', "Fertilizer Application"),  # nutrient deficiency cases
+)
+
+
+def _bullet_block(title: str, items: List[str]) -> str:
+    """'Title:' followed by one '- item' line per item (empty when there are no items)"""
+    if not items:
+        return ""
+    return f"{title}:\n" + "".join(f"- {item}\n" for item in items)
+
+
+def _section_block(title: str, items: List[str]) -> str:
+    """A bullet block followed by a blank line"""
+    block = _bullet_block(title, items)
+    return block + "\n" if block else ""
+
+
+def _json_pointer(*parts: str) -> str:
+    """Build a JSON pointer, escaping '~' and '/' in each key (RFC 6901)"""
+    return "".join("/" + part.replace("~", "~0").replace("/", "~1") for part in parts)
+
+
+class _LazyKnowledgeBase(Mapping):
+    """
+    Read-only mapping over a simdjson document
+    
+    Only the top-level keys are read at load time; each disease entry is
+    converted to a Python dict the first time it is accessed.
+    """
+    
+    def __init__(self, raw: bytes):
+        # The document is only valid while its parser is alive
+        self._parser = simdjson.Parser()
+        self._doc = self._parser.parse(raw)
+        self._keys = list(self._doc.keys())
+        self._key_set = frozenset(self._keys)
+        self._entries: Dict[str, Dict] = {}
+    
+    def __getitem__(self, key: str) -> Dict:
+        entry = self._entries.get(key)
+        if entry is None:
+            if key not in self._key_set:
+                raise KeyError(key)
+            entry = self._doc.at_pointer(_json_pointer(key)).as_dict()
+            self._entries[key] = entry
+        return entry
+    
+    def __contains__(self, key: object) -> bool:
+        return key in self._key_set
+    
+    def __iter__(self):
+        return iter(self._keys)
+    
+    def __len__(self) -> int:
+        return len(self._keys)
+    
+    def field(self, key: str, name: str, default: Any = None) -> Any:
+        """Read one field of an entry without materializing the whole entry"""
+        if key in self._entries:
+            return self._entries[key].get(name, default)
+        try:
+            return self._doc.at_pointer(_json_pointer(key, name))
+        except (KeyError, ValueError):
+            return default
+
 
 class RAGService:
     """Retrieval-Augmented Generation service for crop disease information"""
     
     def __init__(self):
         """Initialize RAG service and load disease knowledge base"""
-        self.disease_db: Dict = {}
+        self.disease_db: Mapping = {}
+        self._lower_index: Dict[str, str] = {}  # lowercased key -> key
+        self._by_crop: Dict[str, List[str]] = {}  # lowercased crop -> keys
+        self._formatted_cache: Dict[str, str] = {}  # cache_key -> LLM context
+        self.localized_db: Dict[str, Mapping] = {}  # language -> pre-translated knowledge base
+        self._localized_cache: Dict[Tuple[str, str], Optional[Dict]] = {}  # (name, language) -> entry
         self._load_knowledge_base()
     
     def _load_knowledge_base(self):
@@ -26,46 +127,98 @@ class RAGService:
                 print(f"❌ Knowledge base not found at: {kb_path}")
                 return
             
-            with open(kb_path, 'r', encoding='utf-8') as f:
-                self.disease_db = json.load(f)
-            
+            self.disease_db = self._parse_knowledge_base(kb_path.read_bytes())
+            self._build_indexes()
             print(f"✓ RAG Knowledge Base loaded: {len(self.disease_db)} diseases")
             
         except Exception as e:
             print(f"❌ Error loading knowledge base: {e}")
             self.disease_db = {}
+            self._lower_index = {}
+            self._by_crop = {}
+            return
+        
+        # Translated variants are optional; missing ones fall back to English
+        for language in LOCALIZED_LANGUAGES:
+            variant_path = kb_path.with_name(f"crop_diseases.{language}.json")
+            if not variant_path.exists():
+                continue
+            try:
+                self.localized_db[language] = self._parse_knowledge_base(variant_path.read_bytes())
+                print(f"✓ RAG Knowledge Base ({language}) loaded: {len(self.localized_db[language])} diseases")
+            except Exception as e:
+                print(f"⚠️  Error loading {variant_path.name}: {e}")
     
-    def get_disease_info(self, disease_name: str) -> Optional[Dict]:
+    @staticmethod
+    def _parse_knowledge_base(raw: bytes) -> Mapping:
+        """Parse a knowledge base file"""
+        if SIMDJSON_AVAILABLE:
+            # Parse lazily: entries are only built when a disease is looked up
+            return _LazyKnowledgeBase(raw)
+        return orjson.loads(raw)
+    
+    def _build_indexes(self):
+        """Precompute case-insensitive and per-crop lookups (the knowledge base is read-only)"""
+        self._lower_index = {key.lower(): key for key in self.disease_db}
+        self._by_crop = {}
+        for key in self.disease_db:
+            self._by_crop.setdefault(self._crop_of(key).lower(), []).append(key)
+    
+    def get_disease_info(self, disease_name: str, language: str = "en") -> Optional[Dict]:
         """
         Retrieve disease information from knowledge base
         
         Args:
             disease_name: Name of the disease (e.g., "chilli_leafspot")
+            language: Language code; pre-translated entries are returned for ta/kn
+                when available, English otherwise
         
         Returns:
             Dictionary with disease information or None if not found
         """
-        if not self.disease_db:
-            return None
+        if language != "en":
+            localized = self.get_localized_entry(disease_name, language)
+            if localized is not None:
+                return localized
         
-        # Direct lookup (case-sensitive)
-        if disease_name in self.disease_db:
-            return self.disease_db[disease_name]
+        # Direct lookup, then case-insensitive; a miss falls through to None
+        return (
+            self.disease_db.get(disease_name)
+            or self.disease_db.get(self._lower_index.get(disease_name.lower(), ""))
+        )
+    
+    def get_localized_entry(self, disease_name: str, language: str) -> Optional[Dict]:
+        """
+        Pre-translated knowledge base entry, without falling back to English
         
-        # Case-insensitive lookup
-        disease_name_lower = disease_name.lower()
-        for key, value in self.disease_db.items():
-            if key.lower() == disease_name_lower:
-                return value
+        Returns:
+            The entry from crop_diseases.<language>.json, or None if that file
+            wasn't loaded or has no entry for the disease
+        """
+        variant = self.localized_db.get(language)
+        if variant is None:
+            return None
         
-        return None
+        cache_key = (disease_name, language)
+        if cache_key not in self._localized_cache:
+            key = self._resolve_key(disease_name)
+            self._localized_cache[cache_key] = variant[key] if key is not None and key in variant else None
+        return self._localized_cache[cache_key]
     
-    def format_context_for_llm(self, disease_info: Dict) -> str:
+    def _resolve_key(self, disease_name: str) -> Optional[str]:
+        """Knowledge base key for a disease name (direct, then case-insensitive)"""
+        if disease_name in self.disease_db:
+            return disease_name
+        return self._lower_index.get(disease_name.lower())
+    
+    def format_context_for_llm(self, disease_info: Dict, cache_key: Optional[str] = None) -> str:
         """
         Format disease information into structured text for LLM context
         
         Args:
             disease_info: Dictionary containing disease information
+            cache_key: Disease key to memoize the result under (the knowledge
+                base is read-only, so the text never changes for a key)
         
         Returns:
             Formatted string with disease context (optimized for LLM input)
@@ -73,109 +226,58 @@ class RAGService:
         if not disease_info:
             return ""
         
+        if cache_key is not None:
+            formatted_context = self._formatted_cache.get(cache_key)
+            if formatted_context is None:
+                formatted_context = self._format_context(disease_info)
+                self._formatted_cache[cache_key] = formatted_context
+            return formatted_context
+        
+        return self._format_context(disease_info)
+    
+    def _format_context(self, disease_info: Dict) -> str:
+        """Build the LLM context text for one disease entry"""
         # Extract key information
-        crop = disease_info.get('crop', 'Unknown')
         disease_name = disease_info.get('disease_name', 'Unknown')
         scientific_name = disease_info.get('scientific_name', '')
-        severity = disease_info.get('severity', 'unknown')
-        spread_rate = disease_info.get('spread_rate', 'unknown')
-        
-        # Build formatted context
-        context_parts = []
-        
-        # Header
-        header = f"Disease: {disease_name}"
-        if scientific_name:
-            header += f" ({scientific_name})"
-        context_parts.append(header)
-        context_parts.append(f"Crop: {crop}")
-        context_parts.append(f"Severity: {severity.title()} | Spread Rate: {spread_rate.title()}")
-        context_parts.append("")
-        
-        # Symptoms
-        symptoms = disease_info.get('symptoms', [])
-        if symptoms:
-            context_parts.append("Symptoms:")
-            for symptom in symptoms:
-                context_parts.append(f"- {symptom}")
-            context_parts.append("")
-        
-        # Causes
-        causes = disease_info.get('causes', [])
-        if causes:
-            context_parts.append("Causes:")
-            for cause in causes:
-                context_parts.append(f"- {cause}")
-            context_parts.append("")
-        
-        # Treatment options
         treatment = disease_info.get('treatment', {})
-        if treatment:
-            context_parts.append("Recommended Treatment:")
-            
-            # Immediate actions
-            immediate = treatment.get('immediate', [])
-            if immediate:
-                context_parts.append("Immediate Actions:")
-                for action in immediate:
-                    context_parts.append(f"- {action}")
-            
-            # Chemical treatment
-            chemical = treatment.get('chemical', [])
-            if chemical:
-                context_parts.append("Chemical Treatment:")
-                for step in chemical:
-                    context_parts.append(f"- {step}")
-            
-            # Organic treatment
-            organic = treatment.get('organic', [])
-            if organic:
-                context_parts.append("Organic Treatment:")
-                for step in organic:
-                    context_parts.append(f"- {step}")
-            
-            # Fertilizers (for nutrient deficiency cases)
-            fertilizers = treatment.get('fertilizers', [])
-            if fertilizers:
-                context_parts.append("Fertilizer Application:")
-                for step in fertilizers:
-                    context_parts.append(f"- {step}")
-            
-            context_parts.append("")
         
-        # Prevention
-        prevention = disease_info.get('prevention', [])
-        if prevention:
-            context_parts.append("Prevention Tips:")
-            for tip in prevention:
-                context_parts.append(f"- {tip}")
-            context_parts.append("")
+        # Section blocks: each is empty or a run of newline-terminated lines
+        treatment_block = ""
+        if treatment:
+            treatment_block = "Recommended Treatment:\n" + "".join(
+                _bullet_block(title, treatment.get(field, []))
+                for field, title in _TREATMENT_SECTIONS
+            ) + "\n"
         
-        # Additional information
         cost = disease_info.get('cost_estimate', '')
         timeline = disease_info.get('timeline', '')
         urgency = disease_info.get('urgency', '')
         yield_impact = disease_info.get('yield_impact', '')
-        
+        additional_block = ""
         if cost or timeline or urgency:
-            context_parts.append("Additional Information:")
-            if cost:
-                context_parts.append(f"Cost Estimate: {cost}")
-            if timeline:
-                context_parts.append(f"Timeline: {timeline}")
-            if urgency:
-                context_parts.append(f"Urgency: {urgency.title()}")
-            if yield_impact:
-                context_parts.append(f"Yield Impact: {yield_impact}")
-        
-        # Special notes
+            additional_block = (
+                "Additional Information:\n"
+                + (f"Cost Estimate: {cost}\n" if cost else "")
+                + (f"Timeline: {timeline}\n" if timeline else "")
+                + (f"Urgency: {urgency.title()}\n" if urgency else "")
+                + (f"Yield Impact: {yield_impact}\n" if yield_impact else "")
+            )
+        
         note = disease_info.get('note', '')
-        if note:
-            context_parts.append("")
-            context_parts.append(f"Important Note: {note}")
         
-        # Join all parts
-        formatted_context = "\n".join(context_parts)
+        formatted_context = _CONTEXT_TEMPLATE.format_map({
+            "header": f"{disease_name} ({scientific_name})" if scientific_name else disease_name,
+            "crop": disease_info.get('crop', 'Unknown'),
+            "severity": disease_info.get('severity', 'unknown').title(),
+            "spread_rate": disease_info.get('spread_rate', 'unknown').title(),
+            "symptoms": _section_block("Symptoms", disease_info.get('symptoms', [])),
+            "causes": _section_block("Causes", disease_info.get('causes', [])),
+            "treatment": treatment_block,
+            "prevention": _section_block("Prevention Tips", disease_info.get('prevention', [])),
+            "additional": additional_block,
+            "note": f"\nImportant Note: {note}\n" if note else "",
+        })[:-1]  # Drop the final line's newline
         
         # Truncate if too long (keep within ~1000 tokens ≈ 4000 chars)
         if len(formatted_context) > 3500:
@@ -197,9 +299,13 @@ class RAGService:
         Returns:
             Dictionary of diseases for that crop
         """
-        crop_diseases = {}
-        for disease_key, disease_info in self.disease_db.items():
-            if disease_info.get('crop', '').lower() == crop_type.lower():
-                crop_diseases[disease_key] = disease_info
-        
-        return crop_diseases
+        return {
+            disease_key: self.disease_db[disease_key]
+            for disease_key in self._by_crop.get(crop_type.lower(), ())
+        }
+    
+    def _crop_of(self, disease_key: str) -> str:
+        """Crop name of a knowledge base entry (without building the entry when lazy)"""
+        if isinstance(self.disease_db, _LazyKnowledgeBase):
+            return self.disease_db.field(disease_key, 'crop', '') or ''
+        return self.disease_db[disease_key].get('crop', '')
@@ -1,17 +1,77 @@
 """
 File storage service for handling image and file uploads
 """
+import io
 import os
 import uuid
+import asyncio
+import contextlib
 import aiofiles
 from pathlib import Path
+from tempfile import SpooledTemporaryFile
 from typing import Optional
 from fastapi import UploadFile, HTTPException, status
 from app.config import settings
 
-# Allowed file extensions
-ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
+# Allowed file extensions (lowercase, without the dot)
+ALLOWED_EXTENSIONS = frozenset({'jpg', 'jpeg', 'png', 'webp'})
+_ALLOWED_EXTENSIONS_TEXT = ', '.join(f".{ext}" for ext in sorted(ALLOWED_EXTENSIONS))
 MAX_FILE_SIZE = settings.MAX_UPLOAD_SIZE
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+# Upload subfolders, created once at startup by ensure_upload_dirs()
+ALLOWED_FOLDERS = frozenset({'scans', 'posts', 'avatars'})
+
+
+def ensure_upload_dirs():
+    """Create the upload subfolders (application startup; idempotent)"""
+    for folder in ALLOWED_FOLDERS:
+        (Path(settings.UPLOAD_FOLDER) / folder).mkdir(parents=True, exist_ok=True)
+
+
+def _spooled_fileno(src: SpooledTemporaryFile) -> Optional[int]:
+    """
+    File descriptor of the spool's backing file, or None while it is held in memory
+    
+    Probes the backing buffer (BytesIO has no fileno); SpooledTemporaryFile.fileno()
+    itself would roll an in-memory body over to disk just to answer.
+    """
+    try:
+        return getattr(src, "_file", src).fileno()
+    except (io.UnsupportedOperation, AttributeError):
+        return None
+
+
+def _copy_spooled_file(src: SpooledTemporaryFile, dest_path: str, size: int):
+    """
+    Copy an upload's spooled body to dest_path in as few syscalls as possible
+    
+    Bodies that spilled to disk are copied in-kernel with os.sendfile (where
+    available); in-memory bodies are written with a single os.write loop.
+    """
+    fd = os.open(dest_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        src_fd = _spooled_fileno(src)
+        if src_fd is not None and hasattr(os, "sendfile"):
+            offset = 0
+            while offset < size:
+                sent = os.sendfile(fd, src_fd, offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+        else:
+            src.seek(0)
+            view = memoryview(src.read())
+            while view:
+                view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+def _discard(path: str):
+    """Remove a partially written upload"""
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(path)
 
 
 async def save_upload_file(file: UploadFile, folder: str = "scans") -> str:
@@ -27,39 +87,65 @@ async def save_upload_file(file: UploadFile, folder: str = "scans") -> str:
         
     Raises:
         HTTPException: If file type or size is invalid
+        ValueError: If folder is not one of ALLOWED_FOLDERS
     """
+    if folder not in ALLOWED_FOLDERS:
+        raise ValueError(f"Unknown upload folder: {folder}")
+    
+    # Reject oversized uploads before touching the disk when the size is already known
+    if file.size is not None and file.size > MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File size exceeds maximum allowed size of {MAX_FILE_SIZE / 1024 / 1024}MB"
+        )
+    
     # Validate file type
-    file_ext = Path(file.filename).suffix.lower()
-    if file_ext not in ALLOWED_EXTENSIONS:
+    _, dot, file_ext = (file.filename or "").rpartition('.')
+    file_ext = file_ext.lower()
+    if not dot or file_ext not in ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File type not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
+            detail=f"File type not allowed. Allowed types: {_ALLOWED_EXTENSIONS_TEXT}"
         )
     
     # Generate unique filename
-    unique_filename = f"{uuid.uuid4()}{file_ext}"
+    unique_filename = f"{uuid.uuid4().hex}.{file_ext}"
     
-    # Create upload directory if it doesn't exist
-    upload_dir = Path(settings.UPLOAD_FOLDER) / folder
-    upload_dir.mkdir(parents=True, exist_ok=True)
+    # Full file path (the folder was created by ensure_upload_dirs at startup)
+    file_path = os.path.join(settings.UPLOAD_FOLDER, folder, unique_filename)
     
-    # Full file path
-    file_path = upload_dir / unique_filename
+    # Body already buffered by the server with a known size: copy it in one go
+    if file.size is not None and isinstance(file.file, SpooledTemporaryFile):
+        try:
+            await asyncio.to_thread(_copy_spooled_file, file.file, file_path, file.size)
+        except Exception as e:
+            _discard(file_path)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to save file: {str(e)}"
+            )
+        return f"/uploads/{folder}/{unique_filename}"
     
-    # Save file
+    # Otherwise save in bounded chunks, rejecting oversized uploads as soon as they pass the limit
     try:
+        total_size = 0
         async with aiofiles.open(file_path, 'wb') as f:
-            content = await file.read()
-            
-            # Check file size
-            if len(content) > MAX_FILE_SIZE:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"File size exceeds maximum allowed size of {MAX_FILE_SIZE / 1024 / 1024}MB"
-                )
-            
-            await f.write(content)
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                total_size += len(chunk)
+                
+                # Check file size
+                if total_size > MAX_FILE_SIZE:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"File size exceeds maximum allowed size of {MAX_FILE_SIZE / 1024 / 1024}MB"
+                    )
+                
+                await f.write(chunk)
+    except HTTPException:
+        _discard(file_path)
+        raise
     except Exception as e:
+        _discard(file_path)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to save file: {str(e)}"
@@ -2,9 +2,12 @@
 Translation Service using IndicTrans2 for multi-language support
 Supports: English (en), Tamil (ta), Kannada (kn)
 """
+import asyncio
 import os
+import threading
 import torch
-from typing import List, Optional, Dict
+from collections import OrderedDict
+from typing import List, Optional, Dict, Tuple
 
 try:
     from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
@@ -20,6 +23,14 @@ except ImportError as e:
 
 from app.config import settings
 
+# Inputs are length-sorted and generated in buckets so one long sentence
+# doesn't pad a whole batch; lengths are padded to a multiple of PAD_MULTIPLE
+TRANSLATION_BUCKET_SIZE = 16
+PAD_MULTIPLE = 32
+
+# Translations are memoized per (src_lang, tgt_lang, text); least recently used evicted first
+TRANSLATION_CACHE_MAX_ENTRIES = 50_000
+
 
 class TranslationService:
     """Service for translating text between English, Tamil, and Kannada"""
@@ -48,50 +59,126 @@ class TranslationService:
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         self.processor = IndicProcessor(inference=True)
         
+        if self.device == "cpu":
+            # Leave half the cores for the event loop and other CPU-bound services
+            torch.set_num_threads(max(1, (os.cpu_count() or 2) // 2))
+        
+        self._cache: "OrderedDict[Tuple[str, str, str], str]" = OrderedDict()
+        self._cache_lock = threading.Lock()  # translate() runs in worker threads
+        
+        # KV cache on by default; disabled if the remote model code rejects it
+        self.use_kv_cache = True
+        
         # Models (lazy loaded)
         self.en_to_indic_model = None
         self.en_to_indic_tokenizer = None
         self.indic_to_en_model = None
         self.indic_to_en_tokenizer = None
+        # One lock per model: translations run in worker threads, and concurrent
+        # first requests must not each load a copy
+        self._en_to_indic_lock = threading.Lock()
+        self._indic_to_en_lock = threading.Lock()
         
         print(f"✓ Translation Service initialized (device: {self.device})")
     
     def _load_en_to_indic(self):
         """Load English to Indic languages model"""
-        if self.en_to_indic_model is None:
+        if self.en_to_indic_model is not None:
+            return
+        
+        with self._en_to_indic_lock:
+            if self.en_to_indic_model is not None:
+                return
+            
             print("📥 Loading English → Indic model...")
             model_name = "ai4bharat/indictrans2-en-indic-dist-200M"
             
-            self.en_to_indic_tokenizer = AutoTokenizer.from_pretrained(
+            tokenizer = AutoTokenizer.from_pretrained(
                 model_name, 
                 trust_remote_code=True
             )
-            self.en_to_indic_model = AutoModelForSeq2SeqLM.from_pretrained(
+            model = self._optimize_model(AutoModelForSeq2SeqLM.from_pretrained(
                 model_name,
                 trust_remote_code=True,
                 torch_dtype=torch.float16 if self.device == "cuda" else torch.float32
-            ).to(self.device)
+            ).to(self.device))
+            
+            # Model last: other threads treat a set model as "loaded"
+            self.en_to_indic_tokenizer = tokenizer
+            self.en_to_indic_model = model
             
             print("✓ English → Indic model loaded")
     
     def _load_indic_to_en(self):
         """Load Indic languages to English model"""
-        if self.indic_to_en_model is None:
+        if self.indic_to_en_model is not None:
+            return
+        
+        with self._indic_to_en_lock:
+            if self.indic_to_en_model is not None:
+                return
+            
             print("📥 Loading Indic → English model...")
             model_name = "ai4bharat/indictrans2-indic-en-dist-200M"
             
-            self.indic_to_en_tokenizer = AutoTokenizer.from_pretrained(
+            tokenizer = AutoTokenizer.from_pretrained(
                 model_name, 
                 trust_remote_code=True
             )
-            self.indic_to_en_model = AutoModelForSeq2SeqLM.from_pretrained(
+            model = self._optimize_model(AutoModelForSeq2SeqLM.from_pretrained(
                 model_name,
                 trust_remote_code=True,
                 torch_dtype=torch.float16 if self.device == "cuda" else torch.float32
-            ).to(self.device)
+            ).to(self.device))
+            
+            # Model last: other threads treat a set model as "loaded"
+            self.indic_to_en_tokenizer = tokenizer
+            self.indic_to_en_model = model
             
             print("✓ Indic → English model loaded")
     
+    def _optimize_model(self, model):
+        """
+        Device-specific inference optimizations
+        
+        CPU: int8 dynamic quantization of the Linear layers (weights are read
+        once per decode step, so this roughly halves memory traffic).
+        CUDA: the model is already fp16; the forward pass is compiled when
+        TORCH_COMPILE_MODELS is enabled, falling back to eager mode on errors.
+        """
+        model.eval()
+        if self.device == "cpu":
+            try:
+                return torch.ao.quantization.quantize_dynamic(
+                    model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+            except Exception as e:
+                print(f"⚠️ Dynamic quantization failed, using fp32 model: {e}")
+                return model
+        
+        if settings.TORCH_COMPILE_MODELS:
+            try:
+                # Compile forward only: generate() calls it once per decoding step
+                model.forward = torch.compile(model.forward, mode="reduce-overhead", fullgraph=False)
+                print("⚡ Compiled translation model with torch.compile")
+            except Exception as e:
+                print(f"⚠️ torch.compile unavailable, using eager mode: {e}")
+        return model
+    
+    def warmup(self):
+        """
+        Load the English → Indic model and run one translation so the first
+        real request does not pay model load and kernel warmup costs
+        """
+        if not TRANSLATION_AVAILABLE or self.processor is None:
+            return
+        
+        if self.device == "cuda":
+            torch.backends.cudnn.benchmark = True
+        
+        self.translate_single("hello", "en", "ta")
+        print("✓ Translation models warmed up")
+    
     def translate(
         self, 
         texts: List[str], 
@@ -123,72 +210,125 @@ class TranslationService:
             print(f"⚠️ Unsupported language pair: {src_lang} → {tgt_lang}")
             return texts
         
-        try:
-            # Determine which model to use
-            if src_lang == "en":
-                # English to Indic
-                self._load_en_to_indic()
-                model = self.en_to_indic_model
-                tokenizer = self.en_to_indic_tokenizer
-            elif tgt_lang == "en":
-                # Indic to English
-                self._load_indic_to_en()
-                model = self.indic_to_en_model
-                tokenizer = self.indic_to_en_tokenizer
-            else:
-                # Indic to Indic (via English pivot)
-                print(f"🔄 Translating {src_lang} → en → {tgt_lang}")
-                intermediate = self.translate(texts, src_lang, "en")
-                return self.translate(intermediate, "en", tgt_lang)
-            
-            # Get IndicTrans language codes
-            src_code = self.LANG_MAP[src_lang]
-            tgt_code = self.LANG_MAP[tgt_lang]
-            
-            # Preprocess
-            batch = self.processor.preprocess_batch(
-                texts, 
-                src_lang=src_code, 
-                tgt_lang=tgt_code
-            )
+        # Serve repeated strings from the cache; only unique misses reach the model
+        cache_keys = [(src_lang, tgt_lang, text) for text in texts]
+        with self._cache_lock:
+            known = {key: self._cache[key] for key in cache_keys if key in self._cache}
+            for key in known:
+                self._cache.move_to_end(key)
+        misses = list(dict.fromkeys(text for key, text in zip(cache_keys, texts) if key not in known))
+        
+        if misses:
+            try:
+                translations = self._translate_batch(misses, src_lang, tgt_lang)
+            except Exception as e:
+                print(f"❌ Translation error: {e}")
+                return texts  # Fallback to original
             
-            # Tokenize
-            inputs = tokenizer(
-                batch,
-                truncation=True,
+            with self._cache_lock:
+                for text, translation in zip(misses, translations):
+                    key = (src_lang, tgt_lang, text)
+                    known[key] = translation
+                    self._cache[key] = translation
+                    self._cache.move_to_end(key)
+                while len(self._cache) > TRANSLATION_CACHE_MAX_ENTRIES:
+                    self._cache.popitem(last=False)
+        
+        return [known[key] for key in cache_keys]
+    
+    def _translate_batch(self, texts: List[str], src_lang: str, tgt_lang: str) -> List[str]:
+        """Run the model over texts (no caching; raises on failure)"""
+        # Determine which model to use
+        if src_lang == "en":
+            # English to Indic
+            self._load_en_to_indic()
+            model = self.en_to_indic_model
+            tokenizer = self.en_to_indic_tokenizer
+        elif tgt_lang == "en":
+            # Indic to English
+            self._load_indic_to_en()
+            model = self.indic_to_en_model
+            tokenizer = self.indic_to_en_tokenizer
+        else:
+            # Indic to Indic (via English pivot)
+            print(f"🔄 Translating {src_lang} → en → {tgt_lang}")
+            intermediate = self._translate_batch(texts, src_lang, "en")
+            return self._translate_batch(intermediate, "en", tgt_lang)
+        
+        # Get IndicTrans language codes
+        src_code = self.LANG_MAP[src_lang]
+        tgt_code = self.LANG_MAP[tgt_lang]
+        
+        # Preprocess
+        batch = self.processor.preprocess_batch(
+            texts, 
+            src_lang=src_code, 
+            tgt_lang=tgt_code
+        )
+        
+        # Tokenize (unpadded, so inputs can be bucketed by length)
+        encoded = tokenizer(
+            batch,
+            truncation=True,
+            max_length=256,
+            return_attention_mask=True
+        )
+        order = sorted(range(len(batch)), key=lambda i: len(encoded["input_ids"][i]))
+        
+        outputs: List[Optional[str]] = [None] * len(batch)
+        for start in range(0, len(order), TRANSLATION_BUCKET_SIZE):
+            bucket = order[start:start + TRANSLATION_BUCKET_SIZE]
+            inputs = tokenizer.pad(
+                {
+                    "input_ids": [encoded["input_ids"][i] for i in bucket],
+                    "attention_mask": [encoded["attention_mask"][i] for i in bucket]
+                },
                 padding="longest",
-                max_length=256,
-                return_tensors="pt",
-                return_attention_mask=True
+                pad_to_multiple_of=PAD_MULTIPLE,
+                return_tensors="pt"
             ).to(self.device)
             
             # Generate translation
-            with torch.inference_mode():
-                generated_tokens = model.generate(
-                    **inputs,
-                    use_cache=False,
-                    min_length=0,
-                    max_length=256,
-                    num_beams=1,
-                    num_return_sequences=1
-                )
+            generated_tokens = self._generate(model, tokenizer, inputs)
             
-            # Decode
-            outputs = tokenizer.batch_decode(
+            # Decode, back into input order
+            decoded = tokenizer.batch_decode(
                 generated_tokens,
                 skip_special_tokens=True,
                 clean_up_tokenization_spaces=True
             )
-            
-            # Postprocess
-            translations = self.processor.postprocess_batch(outputs, lang=tgt_code)
-            
-            print(f"✓ Translated {len(texts)} texts from {src_lang} to {tgt_lang}")
-            return translations
+            for i, text in zip(bucket, decoded):
+                outputs[i] = text
+        
+        # Postprocess
+        translations = self.processor.postprocess_batch(outputs, lang=tgt_code)
         
-        except Exception as e:
-            print(f"❌ Translation error: {e}")
-            return texts  # Fallback to original
+        print(f"✓ Translated {len(texts)} texts from {src_lang} to {tgt_lang}")
+        return translations
+    
+    def _generate(self, model, tokenizer, inputs):
+        """Greedy decoding with the decoder KV cache (falls back to no cache if unsupported)"""
+        generation_kwargs = dict(
+            min_length=0,
+            max_length=256,
+            num_beams=1,
+            num_return_sequences=1,
+            do_sample=False,
+            early_stopping=False,
+            pad_token_id=tokenizer.pad_token_id,
+            eos_token_id=tokenizer.eos_token_id
+        )
+        with torch.inference_mode():
+            if self.use_kv_cache:
+                try:
+                    return model.generate(**inputs, use_cache=True, **generation_kwargs)
+                except (AttributeError, TypeError) as e:
+                    # Some transformers versions break IndicTrans2's cached decoding
+                    # (the remote model code expects an older cache API); other
+                    # errors are real failures and propagate
+                    print(f"⚠️ KV cache generation failed, retrying without cache: {e}")
+                    self.use_kv_cache = False
+            return model.generate(**inputs, use_cache=False, **generation_kwargs)
     
     def translate_single(self, text: str, src_lang: str, tgt_lang: str) -> str:
         """Translate a single text"""
@@ -261,5 +401,40 @@ class TranslationService:
         return result
 
 
-# Global instance
+# Global instance (created once by get_translation_service)
 translation_service: Optional[TranslationService] = None
+_translation_service_lock: Optional[asyncio.Lock] = None
+_translation_service_failed = False  # Set after a failed load so later calls don't retry it
+
+
+async def get_translation_service() -> Optional[TranslationService]:
+    """
+    Get the shared translation service, creating and warming it on first use
+    
+    Concurrent first callers wait on a lock so the IndicTrans2 model is only
+    loaded once. Loading runs in a worker thread so the event loop stays free.
+    
+    A failed load is not retried: later calls return None straight away
+    (restart the server after fixing the cause).
+    
+    Returns:
+        TranslationService instance, or None if it could not be initialized
+    """
+    global translation_service, _translation_service_lock, _translation_service_failed
+    if translation_service is not None or _translation_service_failed:
+        return translation_service
+    
+    if _translation_service_lock is None:
+        _translation_service_lock = asyncio.Lock()
+    
+    async with _translation_service_lock:
+        if translation_service is None and not _translation_service_failed:
+            try:
+                service = await asyncio.to_thread(TranslationService)
+                await asyncio.to_thread(service.warmup)
+                translation_service = service
+            except Exception as e:
+                _translation_service_failed = True
+                print(f"❌ Failed to initialize translation service: {e}")
+    
+    return translation_service
@@ -1,8 +1,10 @@
 """
 Trust score calculation service
 """
+import asyncio
 from typing import Dict, Any
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.asynchronous.database import AsyncDatabase
+from app.utils.dependencies import invalidate_user_cache
 
 
 class TrustScoreCalculator:
@@ -25,10 +27,72 @@ class TrustScoreCalculator:
     MAX_SCORE = 100.0
     
     @staticmethod
-    async def calculate_user_score(user_id: str, db: AsyncIOMotorDatabase) -> float:
+    async def _count_accepted(user_id: str, db: AsyncDatabase) -> int:
+        """Number of the user's comments accepted as a post's solution"""
+        # One round trip: the user's comments joined to the posts that accepted them
+        accepted_pipeline = [
+            {"$match": {"user_id": user_id}},
+            {
+                "$lookup": {
+                    "from": "community_posts",
+                    "localField": "id",
+                    "foreignField": "accepted_response_id",
+                    "as": "accepted_posts"
+                }
+            },
+            {"$group": {"_id": None, "total": {"$sum": {"$size": "$accepted_posts"}}}}
+        ]
+        accepted_cursor = await db.post_comments.aggregate(accepted_pipeline)
+        accepted_result = await accepted_cursor.to_list(1)
+        return accepted_result[0]["total"] if accepted_result else 0
+    
+    @staticmethod
+    async def _count_verified(user_id: str, db: AsyncDatabase) -> int:
+        """Number of the user's AI-verified comments"""
+        return await db.post_comments.count_documents({
+            "user_id": user_id,
+            "is_verified": True
+        })
+    
+    @staticmethod
+    async def _sum_helpful(user_id: str, db: AsyncDatabase) -> int:
+        """Total helpful votes on the user's comments"""
+        helpful_pipeline = [
+            {"$match": {"user_id": user_id}},
+            {"$group": {"_id": None, "total": {"$sum": "$helpful_count"}}}
+        ]
+        helpful_cursor = await db.post_comments.aggregate(helpful_pipeline)
+        helpful_result = await helpful_cursor.to_list(1)
+        return helpful_result[0]["total"] if helpful_result else 0
+    
+    @staticmethod
+    def feedback_category(score: int) -> str:
+        """Bucket a 1-5 feedback score (stored on each trust_feedback document)"""
+        if score >= 4:
+            return "positive"
+        if score == 3:
+            return "neutral"
+        return "negative"
+    
+    @staticmethod
+    async def _feedback_breakdown(user_id: str, db: AsyncDatabase) -> Dict[str, int]:
+        """Positive/neutral/negative feedback counts on the user's suggestions"""
+        feedback_pipeline = [
+            {"$match": {"farmer_id": user_id}},
+            {"$group": {"_id": "$category", "count": {"$sum": 1}}}
+        ]
+        feedback_cursor = await db.trust_feedback.aggregate(feedback_pipeline)
+        feedback_result = await feedback_cursor.to_list(None)
+        return {group["_id"]: group["count"] for group in feedback_result}
+    
+    @staticmethod
+    async def calculate_user_score(user_id: str, db: AsyncDatabase) -> float:
         """
         Calculate user's trust score based on their activity
         
+        Only used by update_user_score: routes read the stored users.trust_score,
+        which increment_score adjusts in place, so nothing recomputes per request.
+        
         Args:
             user_id: User ID
             db: Database instance
@@ -36,58 +100,21 @@ class TrustScoreCalculator:
         Returns:
             Calculated trust score (0-100)
         """
-        score = TrustScoreCalculator.BASE_SCORE
-        
-        # Count accepted responses
-        accepted_responses = await db.community_posts.count_documents({
-            "accepted_response_id": {"$exists": True}
-        })
-        accepted_by_user = 0
-        async for post in db.community_posts.find({"accepted_response_id": {"$exists": True}}):
-            response = await db.post_comments.find_one({
-                "id": post.get("accepted_response_id"),
-                "user_id": user_id
-            })
-            if response:
-                accepted_by_user += 1
+        # The four queries are independent, run them concurrently
+        accepted_by_user, verified_count, helpful_count, feedback = await asyncio.gather(
+            TrustScoreCalculator._count_accepted(user_id, db),
+            TrustScoreCalculator._count_verified(user_id, db),
+            TrustScoreCalculator._sum_helpful(user_id, db),
+            TrustScoreCalculator._feedback_breakdown(user_id, db)
+        )
         
+        score = TrustScoreCalculator.BASE_SCORE
         score += accepted_by_user * TrustScoreCalculator.WEIGHTS["accepted_response"]
-        
-        # Count verified responses
-        verified_count = await db.post_comments.count_documents({
-            "user_id": user_id,
-            "is_verified": True
-        })
         score += verified_count * TrustScoreCalculator.WEIGHTS["verified_response"]
-        
-        # Count helpful votes
-        helpful_pipeline = [
-            {"$match": {"user_id": user_id}},
-            {"$group": {"_id": None, "total": {"$sum": "$helpful_count"}}}
-        ]
-        helpful_result = await db.post_comments.aggregate(helpful_pipeline).to_list(1)
-        helpful_count = helpful_result[0]["total"] if helpful_result else 0
         score += helpful_count * TrustScoreCalculator.WEIGHTS["helpful_vote"]
-        
-        # Count feedback on suggestions
-        feedback_pipeline = [
-            {"$match": {"farmer_id": user_id}},
-            {
-                "$group": {
-                    "_id": None,
-                    "positive": {"$sum": {"$cond": [{"$gte": ["$score", 4]}, 1, 0]}},
-                    "neutral": {"$sum": {"$cond": [{"$eq": ["$score", 3]}, 1, 0]}},
-                    "negative": {"$sum": {"$cond": [{"$lte": ["$score", 2]}, 1, 0]}}
-                }
-            }
-        ]
-        feedback_result = await db.trust_feedback.aggregate(feedback_pipeline).to_list(1)
-        
-        if feedback_result:
-            feedback = feedback_result[0]
-            score += feedback.get("positive", 0) * TrustScoreCalculator.WEIGHTS["positive_feedback"]
-            score += feedback.get("neutral", 0) * TrustScoreCalculator.WEIGHTS["neutral_feedback"]
-            score += feedback.get("negative", 0) * TrustScoreCalculator.WEIGHTS["negative_feedback"]
+        score += feedback.get("positive", 0) * TrustScoreCalculator.WEIGHTS["positive_feedback"]
+        score += feedback.get("neutral", 0) * TrustScoreCalculator.WEIGHTS["neutral_feedback"]
+        score += feedback.get("negative", 0) * TrustScoreCalculator.WEIGHTS["negative_feedback"]
         
         # Clamp score between min and max
         score = max(TrustScoreCalculator.MIN_SCORE, min(score, TrustScoreCalculator.MAX_SCORE))
@@ -95,7 +122,7 @@ class TrustScoreCalculator:
         return round(score, 2)
     
     @staticmethod
-    async def update_user_score(user_id: str, db: AsyncIOMotorDatabase) -> float:
+    async def update_user_score(user_id: str, db: AsyncDatabase) -> float:
         """
         Calculate and update user's trust score in database
         
@@ -112,6 +139,7 @@ class TrustScoreCalculator:
             {"id": user_id},
             {"$set": {"trust_score": new_score}}
         )
+        invalidate_user_cache(user_id)
         
         return new_score
     
@@ -119,7 +147,7 @@ class TrustScoreCalculator:
     async def increment_score(
         user_id: str, 
         action: str, 
-        db: AsyncIOMotorDatabase
+        db: AsyncDatabase
     ) -> float:
         """
         Increment user's trust score for a specific action
@@ -155,11 +183,12 @@ class TrustScoreCalculator:
             {"id": user_id},
             {"$set": {"trust_score": round(new_score, 2)}}
         )
+        invalidate_user_cache(user_id)
         
         return round(new_score, 2)
 
 
 # Convenience function
-async def update_trust_score(user_id: str, db: AsyncIOMotorDatabase) -> float:
+async def update_trust_score(user_id: str, db: AsyncDatabase) -> float:
     """Update and return user's trust score"""
     return await TrustScoreCalculator.update_user_score(user_id, db)
@@ -2,6 +2,12 @@
 from app.utils.security import (
     verify_password,
     get_password_hash,
+    verify_password_async,
+    get_password_hash_async,
+    verify_password_bytes,
+    get_password_hash_bytes,
+    verify_password_bytes_async,
+    get_password_hash_bytes_async,
     create_access_token,
     decode_access_token
 )
@@ -9,16 +15,24 @@ from app.utils.dependencies import (
     get_current_user,
     get_current_active_user,
     require_admin,
-    optional_user
+    optional_user,
+    invalidate_user_cache
 )
 
 __all__ = [
     "verify_password",
     "get_password_hash",
+    "verify_password_async",
+    "get_password_hash_async",
+    "verify_password_bytes",
+    "get_password_hash_bytes",
+    "verify_password_bytes_async",
+    "get_password_hash_bytes_async",
     "create_access_token",
     "decode_access_token",
     "get_current_user",
     "get_current_active_user",
     "require_admin",
     "optional_user",
+    "invalidate_user_cache",
 ]
@@ -1,21 +1,58 @@
 """
 FastAPI dependencies for authentication and authorization
 """
+import time
+from collections import OrderedDict
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from typing import Optional
+from typing import Optional, Tuple
 from app.utils.security import decode_access_token
 from app.database import get_database
 from app.models.user import UserInDB
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.asynchronous.database import AsyncDatabase
 
 # Security scheme for JWT bearer token
 security = HTTPBearer()
 
+# In-process user cache: {user_id: (user, expires_at)}, invalidated when the user document changes
+USER_CACHE_TTL = 30  # seconds
+USER_CACHE_MAX_ENTRIES = 50_000
+_user_cache: "OrderedDict[str, Tuple[UserInDB, float]]" = OrderedDict()
+
+
+def invalidate_user_cache(user_id: str):
+    """Drop a cached user (call after writing to the user's document)"""
+    _user_cache.pop(user_id, None)
+
+
+async def _get_user(user_id: str, db: AsyncDatabase) -> Optional[UserInDB]:
+    """
+    Look up a user by ID, served from the cache for USER_CACHE_TTL seconds
+    
+    Each caller gets its own copy, so changes to current_user stay local
+    to the request instead of leaking into the cached entry.
+    """
+    cached = _user_cache.get(user_id)
+    if cached is not None and cached[1] > time.monotonic():
+        _user_cache.move_to_end(user_id)
+        return cached[0].model_copy()
+    
+    user_dict = await db.users.find_one({"id": user_id})
+    if user_dict is None:
+        _user_cache.pop(user_id, None)
+        return None
+    
+    user = UserInDB(**user_dict)
+    _user_cache[user_id] = (user, time.monotonic() + USER_CACHE_TTL)
+    _user_cache.move_to_end(user_id)
+    while len(_user_cache) > USER_CACHE_MAX_ENTRIES:
+        _user_cache.popitem(last=False)
+    return user.model_copy()
+
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ) -> UserInDB:
     """
     Dependency to get the current authenticated user from JWT token
@@ -40,14 +77,13 @@ async def get_current_user(
     if user_id is None:
         raise credentials_exception
     
-    # Get user from database
-    user_dict = await db.users.find_one({"id": user_id})
+    # Get user (cached)
+    user = await _get_user(user_id, db)
     
-    if user_dict is None:
+    if user is None:
         raise credentials_exception
     
     # Check if user is active
-    user = UserInDB(**user_dict)
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -86,7 +122,7 @@ async def require_admin(
 
 async def optional_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncDatabase = Depends(get_database)
 ) -> Optional[UserInDB]:
     """
     Dependency for optional authentication
@@ -106,10 +142,6 @@ async def optional_user(
         if user_id is None:
             return None
         
-        user_dict = await db.users.find_one({"id": user_id})
-        if user_dict is None:
-            return None
-        
-        return UserInDB(**user_dict)
+        return await _get_user(user_id, db)
     except Exception:
         return None
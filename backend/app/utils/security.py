@@ -1,32 +1,151 @@
 """
 Security utilities for password hashing and JWT token management
 """
-from datetime import datetime, timedelta
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from functools import lru_cache
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+import bcrypt
+import jwt
+from jwt.exceptions import PyJWTError as JWTError
 from app.config import settings
 
-# Password hashing context with bcrypt
-pwd_context = CryptContext(
-    schemes=["bcrypt"],
-    deprecated="auto",
-    bcrypt__rounds=12
-)
+_DEFAULT_TOKEN_LIFETIME = settings.ACCESS_TOKEN_EXPIRE_DAYS * 86400  # seconds
+
+# Encoded once rather than on every sign/verify
+_SECRET_KEY_BYTES = settings.SECRET_KEY.encode('utf-8')
+_ALGORITHMS = [settings.ALGORITHM]
+
+
+def encode_password(password: str) -> bytes:
+    """UTF-8 encode a password, truncated to 72 bytes (bcrypt limitation)"""
+    return password.encode('utf-8')[:72]
+
+
+def verify_password_bytes(password_bytes: bytes, hashed_password: str) -> bool:
+    """Verify an encoded password (see encode_password) against a hashed password"""
+    try:
+        return bcrypt.checkpw(password_bytes, hashed_password.encode('utf-8'))
+    except ValueError:
+        # Not a bcrypt hash
+        return False
+
+
+def get_password_hash_bytes(password_bytes: bytes) -> str:
+    """Hash an encoded password (see encode_password) using bcrypt"""
+    return bcrypt.hashpw(password_bytes, bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)).decode('utf-8')
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password"""
-    # Truncate password to 72 bytes (bcrypt limitation)
-    password_bytes = plain_password.encode('utf-8')[:72]
-    return pwd_context.verify(password_bytes, hashed_password)
+    return verify_password_bytes(encode_password(plain_password), hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     """Hash a password using bcrypt (truncates to 72 bytes)"""
-    # Truncate password to 72 bytes (bcrypt limitation)
-    password_bytes = password.encode('utf-8')[:72]
-    return pwd_context.hash(password_bytes)
+    return get_password_hash_bytes(encode_password(password))
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    Whether a stored hash should be replaced after the next successful login
+    
+    True for hashes with a lower cost than BCRYPT_ROUNDS or in an old
+    bcrypt variant ($2a$, $2y$), like passlib's deprecated="auto".
+    """
+    # Format: $2b$<cost>$<salt + hash>
+    parts = hashed_password.split('$')
+    if len(parts) != 4 or parts[1] != '2b' or not parts[2].isdigit():
+        return True
+    return int(parts[2]) < settings.BCRYPT_ROUNDS
+
+
+# bcrypt is a ~250ms CPU burn per call, so the async variants below run it in
+# worker processes instead of blocking the event loop (created on first use,
+# or up front by start_password_pool)
+PASSWORD_POOL_WORKERS = os.cpu_count() or 1
+_password_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_password_pool() -> ProcessPoolExecutor:
+    """Get the process pool used for password hashing"""
+    global _password_pool
+    if _password_pool is None:
+        # Forked workers inherit the already-imported hashing modules instead of
+        # re-importing the app; fork is only the safe default on Linux
+        context = multiprocessing.get_context("fork") if sys.platform.startswith("linux") else None
+        _password_pool = ProcessPoolExecutor(max_workers=PASSWORD_POOL_WORKERS, mp_context=context)
+    return _password_pool
+
+
+async def start_password_pool():
+    """
+    Start every hashing worker (application startup)
+    
+    Workers are otherwise forked on demand during the first logins, after the
+    ML services have started their threads; forking before that is safer and
+    keeps process startup off the login path.
+    """
+    loop = asyncio.get_running_loop()
+    pool = _get_password_pool()
+    await asyncio.gather(*(
+        loop.run_in_executor(pool, os.getpid) for _ in range(PASSWORD_POOL_WORKERS)
+    ))
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password in the hashing process pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_password_pool(), verify_password, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password in the hashing process pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_password_pool(), get_password_hash, password)
+
+
+async def verify_password_bytes_async(password_bytes: bytes, hashed_password: str) -> bool:
+    """Verify an encoded password in the hashing process pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_password_pool(), verify_password_bytes, password_bytes, hashed_password
+    )
+
+
+async def get_password_hash_bytes_async(password_bytes: bytes) -> str:
+    """Hash an encoded password in the hashing process pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_password_pool(), get_password_hash_bytes, password_bytes)
+
+
+async def get_password_hash_if_needed(hashed_password: str, password_bytes: bytes) -> Optional[str]:
+    """
+    New hash at the current BCRYPT_ROUNDS if the stored one is outdated
+    
+    Call only after password_bytes has been verified against hashed_password.
+    
+    Returns:
+        Replacement hash, or None if the stored hash is current
+    """
+    if not needs_rehash(hashed_password):
+        return None
+    return await get_password_hash_bytes_async(password_bytes)
+
+
+def shutdown_password_pool():
+    """Shut down the password hashing process pool (application shutdown)"""
+    global _password_pool
+    if _password_pool is not None:
+        _password_pool.shutdown(wait=True)
+        _password_pool = None
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -39,32 +158,51 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         
     Returns:
         Encoded JWT token string
+        
+    Raises:
+        ValueError: If data already contains an exp claim
     """
-    to_encode = data.copy()
+    if "exp" in data:
+        raise ValueError("exp is set by create_access_token; pass expires_delta instead")
     
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(days=settings.ACCESS_TOKEN_EXPIRE_DAYS)
-    
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    
-    return encoded_jwt
+    # exp is a NumericDate (whole seconds since the epoch)
+    lifetime = int(expires_delta.total_seconds()) if expires_delta else _DEFAULT_TOKEN_LIFETIME
+    return jwt.encode(
+        {**data, "exp": int(time.time()) + lifetime}, _SECRET_KEY_BYTES, algorithm=settings.ALGORITHM
+    )
+
+
+@lru_cache(maxsize=4096)
+def _decode_cached(token: str) -> Optional[dict]:
+    """Verify and decode a token (memoized on the full token string)"""
+    try:
+        return jwt.decode(
+            token, _SECRET_KEY_BYTES, algorithms=_ALGORITHMS, options={"require": ["exp"]}
+        )
+    except JWTError:
+        return None
 
 
 def decode_access_token(token: str) -> Optional[dict]:
     """
     Decode and verify a JWT access token
     
+    Signature checks are cached per token; expiry is rechecked on every
+    call since a cached token may have expired since it was first seen.
+    
     Args:
         token: JWT token string
         
     Returns:
         Decoded token payload or None if invalid
     """
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
-    except JWTError:
+    payload = _decode_cached(token)
+    if payload is None:
         return None
+    
+    exp = payload.get("exp")
+    if exp is not None and exp <= time.time():
+        return None
+    
+    # Copy so callers can't modify the cached payload
+    return dict(payload)
@@ -0,0 +1,68 @@
+"""
+Pre-translate the disease knowledge base
+Writes knowledge_base/crop_diseases.<lang>.json for each target language;
+RAGService loads these at startup so request-time fallbacks are a dict lookup
+
+Usage (from the backend directory):
+    python scripts/translate_kb.py          # all target languages
+    python scripts/translate_kb.py ta       # a single language
+"""
+import json
+import sys
+import os
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.translation_service import TranslationService, TRANSLATION_AVAILABLE
+from app.services.rag_service import LOCALIZED_LANGUAGES
+
+KB_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "knowledge_base")
+
+# Free-text fields; crop, severity, urgency etc. are identifiers and stay in English
+TEXT_FIELDS = ["disease_name", "symptoms", "causes", "prevention", "timeline", "cost_estimate", "yield_impact", "note"]
+TREATMENT_FIELDS = ["immediate", "chemical", "organic", "fertilizers"]
+
+
+def translate_entry(translator: TranslationService, entry: dict, language: str) -> dict:
+    """Translate one knowledge base entry, including the nested treatment lists"""
+    translated = translator.translate_dict(entry, TEXT_FIELDS, "en", language)
+    if isinstance(entry.get("treatment"), dict):
+        translated["treatment"] = translator.translate_dict(
+            entry["treatment"], TREATMENT_FIELDS, "en", language
+        )
+    return translated
+
+
+def main(languages):
+    if not TRANSLATION_AVAILABLE:
+        print("❌ Translation dependencies not installed")
+        return 1
+
+    unsupported = [lang for lang in languages if lang not in LOCALIZED_LANGUAGES]
+    if unsupported:
+        print(f"❌ Unsupported language(s): {', '.join(unsupported)} (expected: {', '.join(LOCALIZED_LANGUAGES)})")
+        return 1
+
+    with open(os.path.join(KB_DIR, "crop_diseases.json"), encoding="utf-8") as f:
+        knowledge_base = json.load(f)
+
+    translator = TranslationService()
+
+    for language in languages:
+        print(f"🌐 Translating {len(knowledge_base)} diseases to {TranslationService.LANG_NAMES[language]}...")
+        translated = {
+            key: translate_entry(translator, entry, language)
+            for key, entry in knowledge_base.items()
+        }
+
+        output_path = os.path.join(KB_DIR, f"crop_diseases.{language}.json")
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(translated, f, ensure_ascii=False, indent=2)
+        print(f"✓ Wrote {output_path}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:] or list(LOCALIZED_LANGUAGES)))
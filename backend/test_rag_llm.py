@@ -8,10 +8,6 @@ import os
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(__file__))
 
-from app.services.rag_service import RAGService
-from app.services.llm_service import LLMService
-from app.config import settings
-
 
 async def test_rag_llm():
     """Test RAG and LLM services"""
@@ -20,6 +16,11 @@ async def test_rag_llm():
     print("🧪 Testing RAG + LLM Integration")
     print("=" * 60)
     
+    # Imported here so collecting or importing this script stays cheap
+    from app.services.rag_service import RAGService
+    from app.services.llm_service import LLMService
+    from app.config import settings
+    
     # Test RAG Service
     print("\n1️⃣  Testing RAG Service...")
     rag_service = RAGService()
@@ -48,6 +49,13 @@ async def test_rag_llm():
     print("\n3️⃣  Generating treatment advice...")
     context = rag_service.format_context_for_llm(disease_info)
     
+    # Re-runs hit the response cache when diskcache is installed (LLM_CACHE_DIR)
+    cache_key = llm_service.cache_key_for(disease_name, "groundnut", context, 95.0, "en")
+    if llm_service.is_cached(cache_key):
+        print("   💾 Cache hit - skipping the API call")
+    else:
+        print(f"   💾 Cache miss ({'disk' if llm_service.disk_cache is not None else 'memory'} cache)")
+    
     advice = await llm_service.generate_treatment_advice(
         disease_name=disease_name,
         crop_type="groundnut",
@@ -56,6 +64,7 @@ async def test_rag_llm():
         disease_info=disease_info,
         language="en"
     )
+    await llm_service.aclose()
     
     print("\n" + "=" * 60)
     print("📋 TREATMENT ADVICE RESULT:")